@@ -0,0 +1,423 @@
+"""
+Asyncio JSON API for programmatic access to the loan calculator.
+
+A dependency-free ASGI application serving the LoanCalculator engine as JSON:
+
+    POST /api/calculate  Totals and amortization schedule of one loan
+    POST /api/batch      Many loans, streamed back as NDJSON in input order
+    POST /api/solve      Monthly payment that pays a loan off within term_months
+    POST /api/export     PDF report of one loan, streamed
+
+The event loop only parses requests and writes responses. Every computation,
+including the JSON encoding of its result, runs on a bounded process pool.
+Identical requests that arrive while the first one is still being computed
+share its result instead of computing it again. At most ``max_pending``
+computations are queued or running: further single-loan requests are
+rejected with 429 and a Retry-After header, while a running batch waits for
+free slots.
+
+Usage:
+    uvicorn api:app
+    python api.py --port 8001 --workers 8
+"""
+import argparse
+import asyncio
+import functools
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import matplotlib
+matplotlib.use('Agg')
+
+from calculator import LoanCalculator
+from loan_inputs import WARM_UP_LOAN, parse_bool, parse_float, parse_int, parse_loan
+
+
+# Largest request body accepted, in bytes
+MAX_BODY_BYTES = 10 * 1024 * 1024
+
+# Most loans a single /api/batch request may contain
+MAX_BATCH_LOANS = 10_000
+
+# Size of the chunks /api/export streams the PDF in
+EXPORT_CHUNK_BYTES = 64 * 1024
+
+# Seconds a client is asked to wait after a 429
+RETRY_AFTER_SECONDS = 1
+
+loan_calculator = LoanCalculator()
+
+
+class Overloaded(Exception):
+    """Raised when no computation slot is free."""
+
+
+def _json_default(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _dumps(payload):
+    return json.dumps(payload, default=_json_default).encode()
+
+
+def parse_api_loan(record, index=0):
+    """
+    Normalize one loan of a JSON request.
+
+    Takes the fields of loan_inputs.parse_loan plus the optional 'engine'
+    ('float' or 'cents'), 'rounding' and 'with_sensitivities' of
+    LoanCalculator.calculate_loan_payments.
+
+    Returns:
+        dict: Normalized loan dictionary
+    """
+    loan = parse_loan(record, index)
+    loan['engine'] = str(record.get('engine', 'float'))
+    loan['rounding'] = str(record.get('rounding', 'half_even'))
+    loan['with_sensitivities'] = parse_bool(record.get('with_sensitivities', False))
+    return loan
+
+
+def parse_solve(record):
+    """Normalize a /api/solve request: a loan with term_months instead of a monthly payment."""
+    if not isinstance(record, dict):
+        raise ValueError("Request body must be a JSON object")
+    missing = [field for field in ('loan_amount', 'annual_interest_rate', 'term_months')
+               if record.get(field) in (None, '')]
+    if missing:
+        raise ValueError(f"Missing required fields: {', '.join(missing)}")
+
+    fixed_period = record.get('fixed_period_years')
+    return {
+        'loan_amount': parse_float(record['loan_amount'], 'loan_amount'),
+        'annual_interest_rate': parse_float(record['annual_interest_rate'], 'annual_interest_rate'),
+        'term_months': parse_int(record['term_months'], 'term_months'),
+        'fixed_period_years': (parse_int(fixed_period, 'fixed_period_years')
+                               if fixed_period not in (None, '') else None),
+        'include_extra': parse_bool(record.get('include_extra', False)),
+    }
+
+
+def _without_id(loan):
+    """The loan without its id, so identical loans share one computation."""
+    return {key: value for key, value in loan.items() if key != 'id'}
+
+
+def _loan_details(loan):
+    loan_details = loan_calculator.calculate_loan_payments(
+        loan['loan_amount'],
+        loan['annual_interest_rate'],
+        loan['monthly_payment'],
+        loan['fixed_period_years'],
+        include_extra_payment=loan['include_extra'],
+        engine=loan['engine'],
+        rounding=loan['rounding'],
+        with_sensitivities=loan['with_sensitivities']
+    )
+    if loan['fixed_period_years']:
+        loan_details['fixed_period_years'] = loan['fixed_period_years']
+    for optional in ('property_value', 'own_funds'):
+        if optional in loan:
+            loan_details[optional] = loan[optional]
+    return loan_details
+
+
+# Computations run in the worker processes; they return encoded JSON or PDF
+# bytes so the event loop does not spend time on serialization
+
+def calculate_job(loan):
+    return _dumps(_loan_details(loan))
+
+
+def solve_job(request):
+    monthly_payment = loan_calculator.solve_monthly_payment(
+        request['loan_amount'],
+        request['annual_interest_rate'],
+        request['term_months'],
+        request['fixed_period_years'],
+        include_extra_payment=request['include_extra']
+    )
+    loan_details = loan_calculator.calculate_loan_payments(
+        request['loan_amount'],
+        request['annual_interest_rate'],
+        monthly_payment,
+        request['fixed_period_years'],
+        include_extra_payment=request['include_extra']
+    )
+    return _dumps({
+        'monthly_payment': monthly_payment,
+        'term_months': len(loan_details['amortization_schedule']),
+        'total_payment': loan_details['total_payment'],
+        'total_interest': loan_details['total_interest'],
+    })
+
+
+def export_job(loan):
+    loan_details = _loan_details(loan)
+    loan_details['original_term_months'] = loan_calculator.calculate_loan_term(
+        loan['loan_amount'], loan['annual_interest_rate'], loan['monthly_payment']) * 12
+    return loan_calculator.generate_pdf(loan_details)
+
+
+def _init_worker():
+    """Pay matplotlib and fpdf start-up costs once per worker process."""
+    export_job(parse_api_loan(WARM_UP_LOAN))
+
+
+class LoanAPI:
+    """
+    ASGI application serving the JSON API.
+
+    Args:
+        executor (Executor, optional): Executor for the computations
+            (default: a process pool created on first use)
+        workers (int, optional): Size of the default process pool (default: CPU count)
+        max_pending (int): Most computations queued or running at once
+        batch_window (int, optional): Most computations one batch keeps in
+            flight (default: twice the number of workers)
+    """
+
+    def __init__(self, executor=None, workers=None, max_pending=64, batch_window=None):
+        self._executor = executor
+        self._workers = workers or os.cpu_count() or 1
+        self.max_pending = max_pending
+        self.batch_window = batch_window or 2 * self._workers
+        self._slots = asyncio.Semaphore(max_pending)
+        self._inflight = {}
+        self.stats = {'computed': 0, 'coalesced': 0, 'rejected': 0}
+        self.routes = {
+            '/api/calculate': self.calculate,
+            '/api/batch': self.batch,
+            '/api/solve': self.solve,
+            '/api/export': self.export,
+        }
+
+    @property
+    def executor(self):
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self._workers, initializer=_init_worker)
+        return self._executor
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None
+
+    def _finished(self, key, future):
+        self._inflight.pop(key, None)
+        self._slots.release()
+
+    async def compute(self, job, argument, wait=False):
+        """
+        Run ``job(argument)`` on the executor, sharing the result with identical calls.
+
+        Args:
+            job (callable): Module-level computation, e.g. calculate_job
+            argument (dict): JSON-serializable argument of the job
+            wait (bool): Wait for a free slot instead of raising Overloaded
+
+        Returns:
+            The job's result
+        """
+        key = (job.__name__, json.dumps(argument, sort_keys=True))
+        future = self._inflight.get(key)
+        if future is None:
+            if self._slots.locked() and not wait:
+                self.stats['rejected'] += 1
+                raise Overloaded()
+            await self._slots.acquire()
+            # An identical computation may have started while waiting
+            future = self._inflight.get(key)
+            if future is None:
+                future = asyncio.get_running_loop().run_in_executor(self.executor, job, argument)
+                future.add_done_callback(functools.partial(self._finished, key))
+                self._inflight[key] = future
+                self.stats['computed'] += 1
+            else:
+                self._slots.release()
+                self.stats['coalesced'] += 1
+        else:
+            self.stats['coalesced'] += 1
+        # One waiter going away must not cancel the computation for the others
+        return await asyncio.shield(future)
+
+    async def calculate(self, payload, send):
+        body = await self.compute(calculate_job, _without_id(parse_api_loan(payload)))
+        await _send_response(send, 200, body)
+
+    async def solve(self, payload, send):
+        body = await self.compute(solve_job, parse_solve(payload))
+        await _send_response(send, 200, body)
+
+    async def export(self, payload, send):
+        loan = parse_api_loan(payload)
+        pdf = await self.compute(export_job, _without_id(loan))
+        filename = f'amount_{int(loan["loan_amount"])}.pdf'
+        await send({'type': 'http.response.start', 'status': 200, 'headers': [
+            (b'content-type', b'application/pdf'),
+            (b'content-length', str(len(pdf)).encode()),
+            (b'content-disposition', f'attachment; filename="{filename}"'.encode()),
+        ]})
+        for start in range(0, len(pdf), EXPORT_CHUNK_BYTES):
+            await send({'type': 'http.response.body',
+                        'body': pdf[start:start + EXPORT_CHUNK_BYTES], 'more_body': True})
+        await send({'type': 'http.response.body', 'body': b''})
+
+    async def batch(self, payload, send):
+        """
+        Calculate {"loans": [...]} and stream one JSON line per loan in input order.
+
+        Each line holds the loan's 'index', its 'id' once the loan has been
+        parsed, and either its 'result' or an 'error', also when the
+        computation itself fails. At most batch_window loans are computed at
+        a time.
+        """
+        loans = payload.get('loans') if isinstance(payload, dict) else None
+        if not isinstance(loans, list):
+            raise ValueError("Request body must be an object with a list of 'loans'")
+        if len(loans) > MAX_BATCH_LOANS:
+            raise ValueError(f"A batch may contain at most {MAX_BATCH_LOANS} loans")
+        if self._slots.locked():
+            self.stats['rejected'] += 1
+            raise Overloaded()
+
+        async def run(index, record):
+            line = {'index': index}
+            try:
+                loan = parse_api_loan(record, index)
+                line['id'] = loan['id']
+                body = await self.compute(calculate_job, _without_id(loan), wait=True)
+                return b'{"index": %d, "id": %s, "result": %s}\n' % (
+                    index, json.dumps(loan['id']).encode(), body)
+            except (ValueError, TypeError, KeyError, OverflowError) as e:
+                line['error'] = str(e)
+            except Exception as e:
+                # The headers are already sent: report worker failures such
+                # as BrokenProcessPool on the loan's line instead of cutting
+                # off the stream
+                line['error'] = f"{type(e).__name__}: {e}"
+            return _dumps(line) + b'\n'
+
+        await send({'type': 'http.response.start', 'status': 200,
+                    'headers': [(b'content-type', b'application/x-ndjson')]})
+        pending = []
+        try:
+            for index, record in enumerate(loans):
+                pending.append(asyncio.ensure_future(run(index, record)))
+                if len(pending) >= self.batch_window:
+                    await send({'type': 'http.response.body',
+                                'body': await pending.pop(0), 'more_body': True})
+            for task in pending:
+                await send({'type': 'http.response.body', 'body': await task, 'more_body': True})
+        finally:
+            for task in pending:
+                task.cancel()
+        await send({'type': 'http.response.body', 'body': b''})
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+            return
+        if scope['type'] != 'http':
+            return
+
+        route = self.routes.get(scope['path'])
+        if route is None:
+            await _send_error(send, 404, "Not found")
+            return
+        if scope['method'] != 'POST':
+            await _send_error(send, 405, "Method not allowed", [(b'allow', b'POST')])
+            return
+
+        body = await _read_body(receive)
+        if body is None:
+            await _send_error(send, 413, "Request body too large")
+            return
+        try:
+            payload = json.loads(body or b'{}')
+        except ValueError:
+            await _send_error(send, 400, "Request body must be valid JSON")
+            return
+
+        try:
+            await route(payload, send)
+        except Overloaded:
+            await _send_error(send, 429, "Too many pending calculations, retry later",
+                              [(b'retry-after', str(RETRY_AFTER_SECONDS).encode())])
+        except (ValueError, TypeError, KeyError, OverflowError) as e:
+            await _send_error(send, 400, str(e))
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                self.close()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+
+async def _read_body(receive):
+    """Request body, or None if it exceeds MAX_BODY_BYTES."""
+    chunks, size = [], 0
+    while True:
+        message = await receive()
+        chunk = message.get('body', b'')
+        size += len(chunk)
+        if size > MAX_BODY_BYTES:
+            return None
+        chunks.append(chunk)
+        if not message.get('more_body', False):
+            return b''.join(chunks)
+
+
+async def _send_response(send, status, body, headers=()):
+    await send({'type': 'http.response.start', 'status': status, 'headers': [
+        (b'content-type', b'application/json'),
+        (b'content-length', str(len(body)).encode()),
+        *headers,
+    ]})
+    await send({'type': 'http.response.body', 'body': body})
+
+
+async def _send_error(send, status, message, headers=()):
+    await _send_response(send, status, _dumps({'error': message}), headers)
+
+
+app = LoanAPI()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Serve the loan calculator JSON API.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8001)
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Number of worker processes (default: CPU count)')
+    parser.add_argument('--max-pending', type=int, default=64,
+                        help='Most calculations queued at once before answering 429')
+    args = parser.parse_args(argv)
+
+    try:
+        import uvicorn
+    except ImportError:
+        print("Serving the API needs an ASGI server: pip install uvicorn", file=sys.stderr)
+        return 1
+
+    api = LoanAPI(workers=args.workers, max_pending=args.max_pending)
+    try:
+        uvicorn.run(api, host=args.host, port=args.port)
+    finally:
+        api.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,15 +1,19 @@
-from flask import Flask, render_template, request, send_file, session
+from flask import Flask, jsonify, render_template, request, send_file, session
 from calculator import LoanCalculator
 from loan_calculator import save_to_pdf
+from memory_tracking import MemoryTracker
+from sensitivity import PARAMETERS, calculate_sensitivities, tornado
+from refinance import refinance_scan
+import numpy as np
 import os
 import glob
 import io
+import sys
+import time
+import argparse
 import traceback
 from datetime import datetime
 
-import tempfile
-import base64
-
 import matplotlib
 matplotlib.use('Agg')
 
@@ -17,76 +21,104 @@ app = Flask(__name__)
 app.secret_key = os.urandom(24)  # Set a secret key for session
 loan_calculator = LoanCalculator()
 
+# Opt-in per-request memory accounting and leak guard, see memory_tracking.py
+app.config['MEMORY_TRACKING'] = os.environ.get('LOAN_CALCULATOR_MEMORY_TRACKING') == '1'
+app.config['LEAK_GUARD'] = os.environ.get('LOAN_CALCULATOR_LEAK_GUARD') == '1'
+memory_tracker = MemoryTracker(app)
+
+# Scenario used to exercise the chart, PDF and template paths during warm-up
+WARM_UP_SCENARIO = {
+    'property_value': 300000.0,
+    'own_funds': 60000.0,
+    'annual_interest_rate': 3.5,
+    'monthly_payment': 1200.0,
+    'fixed_period_years': 10,
+    'include_extra': True,
+}
+
 
 @app.route('/')
 def index():
     return render_template('index.html')
 
 
+def parse_loan_form(form):
+    """Parse the loan calculator form into keyword arguments for build_loan_details."""
+    fixed_period = form.get('fixed_period', '')
+    return {
+        'property_value': float(form['property_value']),
+        'own_funds': float(form['own_funds']),
+        'annual_interest_rate': float(form['annual_interest_rate']),
+        'monthly_payment': float(form['monthly_payment']),
+        'fixed_period_years': int(fixed_period) if fixed_period.isdigit() else None,
+        'include_extra': form.get('include_extra') == 'true',
+    }
+
+
+def build_loan_details(property_value, own_funds, annual_interest_rate, monthly_payment,
+                       fixed_period_years=None, include_extra=False):
+    """
+    Calculate the loan schedule and chart for the form inputs.
+
+    Returns:
+        tuple: (loan details dict, base64-encoded PNG chart)
+    """
+    # Calculate loan amount from property value and own funds
+    loan_amount = property_value - own_funds
+
+    if loan_amount < 0:
+        raise ValueError("Own funds cannot exceed property value")
+    if loan_amount == 0:
+        raise ValueError(
+            "Loan amount cannot be zero. Own funds must be less than property value.")
+
+    # Calculate loan details
+    loan_details = loan_calculator.calculate_loan_payments(
+        loan_amount,
+        annual_interest_rate,
+        monthly_payment,
+        fixed_period_years,
+        include_extra_payment=include_extra
+    )
+
+    # Store fixed period years in loan details
+    if fixed_period_years:
+        loan_details['fixed_period_years'] = fixed_period_years
+
+    # Store original term for comparison
+    loan_term_years = loan_calculator.calculate_loan_term(
+        loan_amount, annual_interest_rate, monthly_payment)
+    loan_details['original_term_months'] = loan_term_years * 12
+
+    # Generate plot
+    plot_data = loan_calculator.get_plot_data(loan_details)
+
+    # Add property value and own funds to loan details
+    loan_details['property_value'] = property_value
+    loan_details['own_funds'] = own_funds
+
+    return loan_details, plot_data
+
+
 @app.route('/calculate', methods=['POST'])
 def calculate():
     try:
-        # Store complete loan details in session for PDF generation
-        session['loan_data'] = None  # Clear any previous data
+        session.pop('loan_inputs', None)  # Clear any previous data
 
         # Parse form data for calculation
-        property_value = float(request.form['property_value'])
-        own_funds = float(request.form['own_funds'])
-
-        # Calculate loan amount from property value and own funds
-        loan_amount = property_value - own_funds
-
-        if loan_amount < 0:
-            raise ValueError("Own funds cannot exceed property value")
-        if loan_amount == 0:
-            raise ValueError(
-                "Loan amount cannot be zero. Own funds must be less than property value.")
-
-        annual_interest_rate = float(request.form['annual_interest_rate'])
-        monthly_payment = float(request.form['monthly_payment'])
-        include_extra = request.form.get('include_extra') == 'true'
-        fixed_period = request.form.get('fixed_period', '')
-
-        fixed_period_years = int(
-            fixed_period) if fixed_period.isdigit() else None
-
-        # Calculate loan details
-        loan_details = loan_calculator.calculate_loan_payments(
-            loan_amount,
-            annual_interest_rate,
-            monthly_payment,
-            fixed_period_years,
-            include_extra_payment=include_extra
-        )
+        loan_inputs = parse_loan_form(request.form)
 
-        # Store fixed period years in loan details
-        if fixed_period_years:
-            loan_details['fixed_period_years'] = fixed_period_years
+        loan_details, plot_data = build_loan_details(**loan_inputs)
 
-        # Store original term for comparison
-        loan_term_years = loan_calculator.calculate_loan_term(
-            loan_amount, annual_interest_rate, monthly_payment)
-        loan_details['original_term_months'] = loan_term_years * 12
-
-        # Generate plot
-        plot_data = loan_calculator.get_plot_data(loan_details)
-
-        # Add property value and own funds to loan details
-        loan_details['property_value'] = property_value
-        loan_details['own_funds'] = own_funds
-
-        # Store complete loan details in session for PDF generation
-        session['loan_data'] = {
-            'loan_details': loan_details,
-            'plot_data': plot_data,
-            'fixed_period_years': fixed_period_years
-        }
+        # Only the inputs go into the session cookie; the schedule and chart
+        # are recalculated for the PDF instead of being carried around
+        session['loan_inputs'] = loan_inputs
 
         return render_template(
             'results.html',
             loan_details=loan_details,
             plot_data=plot_data,
-            fixed_period_years=fixed_period_years
+            fixed_period_years=loan_inputs['fixed_period_years']
         )
     except ValueError as e:
         return render_template('index.html', error=str(e))
@@ -95,51 +127,36 @@ def calculate():
 @app.route('/generate_pdf', methods=['POST'])
 def generate_pdf():
     try:
-        # Get the stored loan data from session
-        if 'loan_data' not in session:
+        # Get the stored loan inputs from session
+        if 'loan_inputs' not in session:
             return "No loan calculation data found. Please calculate the loan first.", 400
 
-        loan_data = session['loan_data']
-        loan_details = loan_data['loan_details']
-
-        # Ensure plot_data is available in loan_details
-        if 'plot_data' in loan_data:
-            loan_details['plot_data'] = loan_data['plot_data']
+        loan_inputs = session['loan_inputs']
+        loan_details, plot_data = build_loan_details(**loan_inputs)
 
         try:
-            # Decode plot data and save to temporary file
-            plot_data_b64 = loan_details.get('plot_data')
-            with tempfile.NamedTemporaryFile(suffix='.png', delete=False) as tmp_plot:
-                tmp_plot.write(base64.b64decode(plot_data_b64))
-                plot_path = tmp_plot.name
-
-            try:
-                # Generate PDF using the LoanCalculator's generate_pdf method
-                pdf_bytes = loan_calculator.generate_pdf(loan_details)
-
-                # Set filename for the PDF
-                timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-                filename = f'amount_{int(loan_details["loan_amount"])}_{timestamp}.pdf'
-
-                # Create response with PDF
-                response = send_file(
-                    io.BytesIO(pdf_bytes),
-                    mimetype='application/pdf',
-                    as_attachment=True,
-                    download_name=filename
-                )
-                response.headers['Content-Type'] = 'application/pdf'
-                return response
-
-            finally:
-                # Clean up temporary plot file
-                if os.path.exists(plot_path):
-                    os.remove(plot_path)
+            # Generate PDF using the LoanCalculator's generate_pdf method
+            pdf_bytes = loan_calculator.generate_pdf(
+                dict(loan_details, plot_data=plot_data))
+
+            # Set filename for the PDF
+            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+            filename = f'amount_{int(loan_details["loan_amount"])}_{timestamp}.pdf'
+
+            # Create response with PDF
+            response = send_file(
+                io.BytesIO(pdf_bytes),
+                mimetype='application/pdf',
+                as_attachment=True,
+                download_name=filename
+            )
+            response.headers['Content-Type'] = 'application/pdf'
+            return response
 
         except Exception as e:
             app.logger.error(
                 f"Error generating PDF: {str(e)}\n{traceback.format_exc()}")
-            return render_template('results.html', loan_details=loan_details, plot_data=loan_data.get('plot_data'), fixed_period_years=loan_data.get('fixed_period_years'), error=f"PDF generation failed: {str(e)}"), 500
+            return render_template('results.html', loan_details=loan_details, plot_data=plot_data, fixed_period_years=loan_inputs.get('fixed_period_years'), error=f"PDF generation failed: {str(e)}"), 500
 
     except ValueError as e:
         app.logger.error(f"Error with input values: {str(e)}")
@@ -150,5 +167,191 @@ def generate_pdf():
         return f"Unexpected error: {str(e)}", 500
 
 
+@app.route('/sensitivity', methods=['POST'])
+def sensitivity():
+    """
+    Sensitivities of the totals and a tornado chart for the loan form inputs.
+
+    Step sizes for the tornado chart can be set with the optional form fields
+    annual_interest_rate_step, monthly_payment_step and
+    annual_extra_payment_step. Steps that would make the loan unpayable are
+    clipped; if the tornado chart still cannot be computed, the response holds
+    the sensitivities and a tornado_error.
+    """
+    try:
+        loan_inputs = parse_loan_form(request.form)
+        loan_amount = loan_inputs['property_value'] - loan_inputs['own_funds']
+        if loan_amount <= 0:
+            raise ValueError("Own funds must be less than property value")
+        steps = {name: float(request.form[f'{name}_step'])
+                 for name in PARAMETERS if request.form.get(f'{name}_step')}
+
+        loan_args = (
+            loan_amount,
+            loan_inputs['annual_interest_rate'],
+            loan_inputs['monthly_payment'],
+            loan_inputs['fixed_period_years'],
+        )
+        sensitivities = calculate_sensitivities(
+            *loan_args, include_extra_payment=loan_inputs['include_extra'])
+
+        # The derivatives stand on their own when the stepped scenarios fail
+        try:
+            tornado_data = tornado(
+                *loan_args, include_extra_payment=loan_inputs['include_extra'], steps=steps)
+        except ValueError as e:
+            app.logger.warning(f"Tornado chart skipped: {str(e)}")
+            return jsonify({'sensitivities': sensitivities, 'tornado': None,
+                            'plot_data': None, 'tornado_error': str(e)})
+
+        return jsonify({
+            'sensitivities': sensitivities,
+            'tornado': tornado_data,
+            'plot_data': loan_calculator.get_tornado_plot_data(tornado_data),
+        })
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+
+# Largest rate x fee x payment grid /refinance evaluates per request
+MAX_REFINANCE_GRID_POINTS = 5_000
+
+
+def _grid_from_form(form, name, default_min, default_max, default_step):
+    """Inclusive grid from the optional <name>_min/_max/_step form fields."""
+    start = float(form.get(f'{name}_min') or default_min)
+    stop = float(form.get(f'{name}_max') or default_max)
+    step = float(form.get(f'{name}_step') or default_step)
+    if not (np.isfinite(start) and np.isfinite(stop) and np.isfinite(step)) or step <= 0 or stop < start:
+        raise ValueError(f"Invalid {name} grid")
+
+    # Count the points before building the grid, so a tiny step cannot
+    # allocate a huge array only to be rejected afterwards
+    count = (stop - start) / step
+    if not np.isfinite(count) or count + 1 > MAX_REFINANCE_GRID_POINTS:
+        raise ValueError(f"The {name} grid is too large")
+    # Tolerate float error in the last point, as for a step that divides the range
+    count = int(np.floor(count + 1e-9)) + 1
+    return np.round(start + step * np.arange(count), 6)
+
+
+@app.route('/refinance', methods=['POST'])
+def refinance():
+    """
+    Break-even months and net savings of refinancing at the end of the fixed period.
+
+    Takes the calculator form (a fixed period is required) plus optional grid
+    fields rate_min/rate_max/rate_step, fee_min/fee_max/fee_step, a
+    comma-separated list of new_payments and the follow-up current_rate.
+    With heatmap=true the response also holds a heatmap of the net savings.
+    """
+    try:
+        loan_inputs = parse_loan_form(request.form)
+        loan_amount = loan_inputs['property_value'] - loan_inputs['own_funds']
+        if loan_amount <= 0:
+            raise ValueError("Own funds must be less than property value")
+
+        loan_details = loan_calculator.calculate_loan_payments(
+            loan_amount,
+            loan_inputs['annual_interest_rate'],
+            loan_inputs['monthly_payment'],
+            loan_inputs['fixed_period_years'],
+            include_extra_payment=loan_inputs['include_extra']
+        )
+
+        rate = loan_inputs['annual_interest_rate']
+        new_rates = _grid_from_form(request.form, 'rate', max(0.1, rate - 2), rate + 2, 0.1)
+        fees = _grid_from_form(request.form, 'fee', 0, 5000, 250)
+        new_payments = None
+        if request.form.get('new_payments'):
+            new_payments = [float(p) for p in request.form['new_payments'].split(',')]
+        if len(new_rates) * len(fees) * len(new_payments or [None]) > MAX_REFINANCE_GRID_POINTS:
+            raise ValueError("Refinancing grid is too large")
+
+        current_rate = request.form.get('current_rate')
+        scan = refinance_scan(
+            loan_details, new_rates, fees, new_payments,
+            current_rate=float(current_rate) if current_rate else None)
+
+        if request.form.get('heatmap') == 'true':
+            scan['plot_data'] = loan_calculator.get_refinance_plot_data(scan)
+        return jsonify(scan)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+
+# Whether warm_up() has run in this process; forked workers inherit it
+_warmed_up = False
+
+
+def warm_up():
+    """
+    Run one dummy scenario through every expensive code path.
+
+    Initializes the matplotlib backend and font cache, fpdf font loading,
+    the tornado chart and refinancing heatmap renderers and compiles both
+    Jinja templates, so the first real request on a worker is as fast as the
+    steady state.
+
+    Returns:
+        float: Warm-up time in seconds
+    """
+    global _warmed_up
+    start = time.perf_counter()
+
+    loan_details, plot_data = build_loan_details(**WARM_UP_SCENARIO)
+    loan_calculator.generate_pdf(dict(loan_details, plot_data=plot_data))
+
+    loan_args = (
+        loan_details['loan_amount'],
+        WARM_UP_SCENARIO['annual_interest_rate'],
+        WARM_UP_SCENARIO['monthly_payment'],
+        WARM_UP_SCENARIO['fixed_period_years'],
+    )
+    calculate_sensitivities(*loan_args, include_extra_payment=WARM_UP_SCENARIO['include_extra'])
+    loan_calculator.get_tornado_plot_data(
+        tornado(*loan_args, include_extra_payment=WARM_UP_SCENARIO['include_extra']))
+    rate = WARM_UP_SCENARIO['annual_interest_rate']
+    scan = refinance_scan(loan_details, [rate - 1, rate], [0, 1000])
+    loan_calculator.get_refinance_plot_data(scan)
+
+    with app.test_request_context():
+        render_template('index.html')
+        render_template(
+            'results.html',
+            loan_details=loan_details,
+            plot_data=plot_data,
+            fixed_period_years=WARM_UP_SCENARIO['fixed_period_years']
+        )
+
+    _warmed_up = True
+    return time.perf_counter() - start
+
+
+# Gunicorn hooks, to be imported from a gunicorn config file. Use one of them:
+# on_starting with --preload warms up the master once and the forked workers
+# inherit it, post_fork alone warms up every worker. If both are used,
+# post_fork skips workers that inherited the warm-up.
+
+def on_starting(server):
+    """Gunicorn hook: warm up in the master so workers forked with --preload inherit it."""
+    server.log.info(f"Warm-up finished in {warm_up():.2f}s")
+
+
+def post_fork(server, worker):
+    """Gunicorn hook: warm up each worker before it accepts traffic, unless it inherited the warm-up."""
+    if _warmed_up:
+        server.log.info(f"Worker {worker.pid} inherited the warm-up from the master")
+        return
+    server.log.info(f"Worker {worker.pid} warm-up finished in {warm_up():.2f}s")
+
+
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Run the loan calculator web app.')
+    parser.add_argument('--warm-up', action='store_true',
+                        help='Exercise chart, PDF and template rendering before serving')
+    args = parser.parse_args()
+
+    if args.warm_up:
+        print(f"Warm-up finished in {warm_up():.2f}s", file=sys.stderr)
     app.run(debug=True)
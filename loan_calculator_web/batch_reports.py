@@ -0,0 +1,220 @@
+"""
+Non-interactive batch generation of loan PDF reports.
+
+Reads a CSV or JSON file of loans, computes each amortization schedule and
+renders the chart and PDF report across a pool of worker processes. Reports
+are written to a directory or streamed into a zip archive.
+
+Usage:
+    python batch_reports.py loans.csv --output-dir reports/
+    python batch_reports.py loans.json --zip reports.zip --workers 8
+    python batch_reports.py loans.csv --zip - > reports.zip
+"""
+import argparse
+import csv
+import io
+import json
+import os
+import re
+import sys
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+
+import matplotlib
+matplotlib.use('Agg')
+
+from loan_calculator import build_pdf, calculate_loan_payments, calculate_loan_term, plot_loan_burndown
+from loan_inputs import WARM_UP_LOAN, parse_loan
+
+
+def load_loans(path):
+    """
+    Load loans from a CSV or JSON file.
+
+    CSV files need a header row; JSON files hold a list of objects. Both use
+    the columns ``loan_amount``, ``annual_interest_rate`` and
+    ``monthly_payment``, plus the optional ``id``, ``fixed_period_years``,
+    ``include_extra``, ``property_value`` and ``own_funds``.
+
+    Args:
+        path (str): Path to a ``.csv`` or ``.json`` file
+
+    Returns:
+        list: List of normalized loan dictionaries
+    """
+    with open(path, newline='') as f:
+        if path.lower().endswith('.json'):
+            records = json.load(f)
+        else:
+            records = list(csv.DictReader(f))
+    return [parse_loan(record, i) for i, record in enumerate(records)]
+
+
+def report_filename(loan, index=0):
+    """
+    Stable file name for a loan's report.
+
+    The row index keeps names unique when ids repeat, and characters other
+    than letters, digits, '.', '-' and '_' in the id are replaced so an id
+    cannot point into another directory.
+    """
+    loan_id = re.sub(r'[^\w.-]', '_', loan['id'])
+    return f'{index + 1}_loan_{loan_id}_amount_{int(loan["loan_amount"])}.pdf'
+
+
+def render_report(loan, index=0):
+    """
+    Compute the schedule for a loan and render its PDF report in memory.
+
+    Args:
+        loan (dict): Normalized loan dictionary as returned by ``load_loans``
+        index (int): Row of the loan in the input, used in the file name
+
+    Returns:
+        tuple: (file name, PDF bytes or None, error message or None)
+    """
+    name = report_filename(loan, index)
+    try:
+        loan_details = calculate_loan_payments(
+            loan['loan_amount'],
+            loan['annual_interest_rate'],
+            loan['monthly_payment'],
+            loan['fixed_period_years'],
+            include_extra_payment=loan['include_extra']
+        )
+        if loan['fixed_period_years']:
+            loan_details['fixed_period_years'] = loan['fixed_period_years']
+        loan_details['original_term_months'] = calculate_loan_term(
+            loan['loan_amount'], loan['annual_interest_rate'], loan['monthly_payment']) * 12
+        for optional in ('property_value', 'own_funds'):
+            if optional in loan:
+                loan_details[optional] = loan[optional]
+
+        # Keep the chart in memory instead of round-tripping through a temp file
+        plot = io.BytesIO()
+        plot_loan_burndown(loan_details, save_to_file=plot)
+        plot.seek(0)
+
+        return name, bytes(build_pdf(loan_details, plot).output()), None
+    except Exception as e:
+        return name, None, str(e)
+
+
+def _init_worker():
+    """Pay matplotlib and fpdf start-up costs once per worker process."""
+    render_report(parse_loan(WARM_UP_LOAN))
+
+
+class _ZipWriter:
+    def __init__(self, target):
+        self._zip = zipfile.ZipFile(target, 'w', compression=zipfile.ZIP_DEFLATED)
+
+    def write(self, name, data):
+        self._zip.writestr(name, data)
+
+    def close(self):
+        self._zip.close()
+
+
+class _DirectoryWriter:
+    def __init__(self, directory):
+        os.makedirs(directory, exist_ok=True)
+        self._directory = directory
+
+    def write(self, name, data):
+        with open(os.path.join(self._directory, name), 'wb') as f:
+            f.write(data)
+
+    def close(self):
+        pass
+
+
+def generate_reports(loans, writer, workers=None, chunksize=4, progress_every=100, log=sys.stderr):
+    """
+    Render reports for all loans in parallel and hand them to ``writer``.
+
+    Reports are written in input order as soon as they are ready, so a zip
+    archive can be streamed without holding every PDF in memory.
+
+    Args:
+        loans (list): Loans as returned by ``load_loans``
+        writer: Object with ``write(name, data)``
+        workers (int, optional): Number of worker processes (default: CPU count)
+        chunksize (int): Loans handed to a worker per round trip
+        progress_every (int): Report progress every this many loans
+        log (file): Stream for progress and error messages
+
+    Returns:
+        dict: Dictionary containing:
+            - generated: Number of reports written
+            - failed: List of (file name, error message) tuples
+            - elapsed_seconds: Wall-clock time spent rendering
+            - reports_per_second: Throughput over the whole run
+    """
+    failed = []
+    generated = 0
+    start = time.perf_counter()
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as executor:
+        results = executor.map(render_report, loans, range(len(loans)), chunksize=chunksize)
+        for done, (name, data, error) in enumerate(results, start=1):
+            if error is None:
+                writer.write(name, data)
+                generated += 1
+            else:
+                failed.append((name, error))
+                print(f"Failed {name}: {error}", file=log)
+
+            if done % progress_every == 0 or done == len(loans):
+                elapsed = time.perf_counter() - start
+                print(f"{done}/{len(loans)} reports "
+                      f"({done / elapsed:.1f} reports/s)", file=log)
+
+    elapsed = time.perf_counter() - start
+    return {
+        'generated': generated,
+        'failed': failed,
+        'elapsed_seconds': elapsed,
+        'reports_per_second': len(loans) / elapsed if elapsed > 0 else 0.0,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Generate loan PDF reports for every loan in a CSV or JSON file.')
+    parser.add_argument('input', help='CSV or JSON file with one loan per row/object')
+    output = parser.add_mutually_exclusive_group(required=True)
+    output.add_argument('--output-dir', help='Directory to write the PDF reports to')
+    output.add_argument('--zip', help="Zip archive to write, or '-' to stream to stdout")
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Number of worker processes (default: CPU count)')
+    parser.add_argument('--chunksize', type=int, default=4,
+                        help='Loans handed to a worker at a time')
+    parser.add_argument('--progress-every', type=int, default=100,
+                        help='Print progress every N reports')
+    args = parser.parse_args(argv)
+
+    loans = load_loans(args.input)
+    if args.output_dir:
+        writer = _DirectoryWriter(args.output_dir)
+    elif args.zip == '-':
+        writer = _ZipWriter(sys.stdout.buffer)
+    else:
+        writer = _ZipWriter(args.zip)
+
+    try:
+        stats = generate_reports(loans, writer, workers=args.workers,
+                                 chunksize=args.chunksize,
+                                 progress_every=args.progress_every)
+    finally:
+        writer.close()
+
+    print(f"Generated {stats['generated']} reports in {stats['elapsed_seconds']:.1f}s "
+          f"({stats['reports_per_second']:.1f} reports/s), "
+          f"{len(stats['failed'])} failed", file=sys.stderr)
+    return 1 if stats['failed'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
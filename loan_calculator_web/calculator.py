@@ -1,5 +1,9 @@
-from loan_calculator import format_currency, calculate_loan_term, calculate_loan_payments
-import matplotlib.pyplot as plt
+from loan_calculator import format_currency, calculate_loan_term, calculate_loan_payments, solve_monthly_payment
+from fixed_point import calculate_loan_payments_cents
+from sensitivity import calculate_sensitivities
+import numpy as np
+from matplotlib.figure import Figure
+from matplotlib.ticker import FuncFormatter
 from fpdf import FPDF
 from datetime import datetime
 import os
@@ -20,15 +24,54 @@ class LoanCalculator:
     def calculate_loan_term(self, loan_amount, annual_interest_rate, monthly_payment):
         return calculate_loan_term(loan_amount, annual_interest_rate, monthly_payment)
 
+    def solve_monthly_payment(self, loan_amount, annual_interest_rate, term_months,
+                              fixed_interest_period_years=None, include_extra_payment=False):
+        return solve_monthly_payment(loan_amount, annual_interest_rate, term_months,
+                                     fixed_interest_period_years, include_extra_payment)
+
     def calculate_loan_payments(self, loan_amount, annual_interest_rate, monthly_payment,
-                                fixed_interest_period_years=None, include_extra_payment=False):
-        return calculate_loan_payments(
-            loan_amount,
-            annual_interest_rate,
-            monthly_payment,
-            fixed_interest_period_years,
-            include_extra_payment=include_extra_payment
-        )
+                                fixed_interest_period_years=None, include_extra_payment=False,
+                                engine='float', rounding='half_even', with_sensitivities=False):
+        """
+        Calculate the loan schedule with the float engine or, with
+        ``engine='cents'``, the cent-exact fixed-point engine using the given
+        interest ``rounding`` ('half_even', 'half_up' or 'down'). With
+        ``with_sensitivities`` the result also holds the derivatives of the
+        totals under 'sensitivities' (see sensitivity.calculate_sensitivities).
+        The sensitivities follow the float schedule, so they cannot be
+        combined with the cents engine.
+        """
+        if engine == 'cents' and with_sensitivities:
+            raise ValueError("Sensitivities are only available with the float engine")
+        if engine == 'cents':
+            result = calculate_loan_payments_cents(
+                loan_amount,
+                annual_interest_rate,
+                monthly_payment,
+                fixed_interest_period_years,
+                include_extra_payment=include_extra_payment,
+                rounding=rounding
+            )
+        elif engine == 'float':
+            result = calculate_loan_payments(
+                loan_amount,
+                annual_interest_rate,
+                monthly_payment,
+                fixed_interest_period_years,
+                include_extra_payment=include_extra_payment
+            )
+        else:
+            raise ValueError(f"Unknown engine '{engine}', expected 'float' or 'cents'")
+
+        if with_sensitivities:
+            result['sensitivities'] = calculate_sensitivities(
+                loan_amount,
+                annual_interest_rate,
+                monthly_payment,
+                fixed_interest_period_years,
+                include_extra_payment=include_extra_payment
+            )
+        return result
 
     def get_plot_data(self, loan_details):
         """Generate plot data for web display."""
@@ -50,51 +93,101 @@ class LoanCalculator:
             cumulative_principal.append(total_principal)
             cumulative_interest.append(total_interest)
 
-        plt.figure(figsize=(12, 6))
-        plt.plot(months, balances, 'b-',
-                 label='Remaining Balance', linewidth=2)
-        plt.fill_between(months, cumulative_principal,
-                         alpha=0.3, color='g', label='Principal Paid')
-        plt.fill_between(months, cumulative_interest, alpha=0.3,
-                         color='r', label='Interest Paid')
+        # Use a standalone Figure instead of pyplot: it is never registered in
+        # pyplot's global figure list, so it cannot leak if rendering fails and
+        # is safe to use from concurrent request threads
+        fig = Figure(figsize=(12, 6))
+        ax = fig.subplots()
+        ax.plot(months, balances, 'b-',
+                label='Remaining Balance', linewidth=2)
+        ax.fill_between(months, cumulative_principal,
+                        alpha=0.3, color='g', label='Principal Paid')
+        ax.fill_between(months, cumulative_interest, alpha=0.3,
+                        color='r', label='Interest Paid')
+
+        ax.set_title('Loan Amortization Over Time')
+        ax.set_xlabel('Month')
+        ax.set_ylabel('Amount (€)')
+        ax.grid(True, linestyle='--', alpha=0.7)
+        ax.legend()
+
+        ax.yaxis.set_major_formatter(
+            FuncFormatter(lambda x, p: f'€{x:,.0f}'))
 
-        plt.title('Loan Amortization Over Time')
-        plt.xlabel('Month')
-        plt.ylabel('Amount (€)')
-        plt.grid(True, linestyle='--', alpha=0.7)
-        plt.legend()
+        # Convert plot to base64 string for web display
+        img_data = io.BytesIO()
+        fig.savefig(img_data, format='png', bbox_inches='tight')
 
-        plt.gca().yaxis.set_major_formatter(
-            plt.FuncFormatter(lambda x, p: f'€{x:,.0f}'))
+        return base64.b64encode(img_data.getvalue()).decode()
+
+    def get_tornado_plot_data(self, tornado_data):
+        """Generate a tornado chart of the change in total interest per input step."""
+        labels = {
+            'annual_interest_rate': 'Interest rate ±{step:.2f}%',
+            'monthly_payment': 'Monthly payment ±€{step:,.0f}',
+            'annual_extra_payment': 'Annual extra payment ±€{step:,.0f}',
+        }
+        bars = sorted(tornado_data['bars'], key=lambda bar: abs(
+            bar['total_interest']['high'] - bar['total_interest']['low']))
+        names = [labels[bar['parameter']].format(step=bar['step']) for bar in bars]
+        low = [bar['total_interest']['low'] - bar['total_interest']['base'] for bar in bars]
+        high = [bar['total_interest']['high'] - bar['total_interest']['base'] for bar in bars]
+
+        fig = Figure(figsize=(10, 4))
+        ax = fig.subplots()
+        ax.barh(names, low, color='g', alpha=0.6, label='Step down')
+        ax.barh(names, high, color='r', alpha=0.6, label='Step up')
+        ax.axvline(0, color='black', linewidth=1)
+
+        ax.set_title('Change in Total Interest')
+        ax.set_xlabel('Amount (€)')
+        ax.grid(True, axis='x', linestyle='--', alpha=0.7)
+        ax.legend()
+        ax.xaxis.set_major_formatter(
+            FuncFormatter(lambda x, p: f'€{x:,.0f}'))
 
-        # Convert plot to base64 string for web display
         img_data = io.BytesIO()
-        plt.savefig(img_data, format='png', bbox_inches='tight')
-        img_data.seek(0)
-        plt.close()
+        fig.savefig(img_data, format='png', bbox_inches='tight')
 
         return base64.b64encode(img_data.getvalue()).decode()
 
-    def generate_pdf(self, loan_details):
-        """Generate PDF report by using save_to_pdf from loan_calculator module."""
-        from loan_calculator import save_to_pdf
-        import tempfile
+    def get_refinance_plot_data(self, scan, payment_index=0):
+        """Generate a heatmap of refinancing net savings over new rates and fees."""
+        net_savings = np.array(scan['net_savings'][payment_index], dtype=float)
+        break_even = np.array(scan['break_even_month'][payment_index], dtype=float)
+        rates, fees = scan['new_rates'], scan['fees']
+
+        fig = Figure(figsize=(10, 6))
+        ax = fig.subplots()
+        limit = np.nanmax(np.abs(net_savings)) if np.isfinite(net_savings).any() else 1
+        image = ax.pcolormesh(fees, rates, net_savings, cmap='RdYlGn',
+                              vmin=-limit, vmax=limit, shading='nearest')
+        colorbar = fig.colorbar(image, ax=ax)
+        colorbar.set_label('Net Savings (€)')
+        colorbar.formatter = FuncFormatter(lambda x, p: f'€{x:,.0f}')
+        colorbar.update_ticks()
+
+        # Break-even contours in years
+        if np.isfinite(break_even).sum() > 1 and len(rates) > 1 and len(fees) > 1:
+            contours = ax.contour(fees, rates, break_even / 12, colors='black',
+                                  linewidths=0.8, levels=[1, 2, 5, 10])
+            ax.clabel(contours, fmt='%d y')
+
+        ax.set_title(f'Refinancing at {format_currency(scan["balance"])} remaining')
+        ax.set_xlabel('Refinancing Fee (€)')
+        ax.set_ylabel('New Annual Interest Rate (%)')
 
-        # Save plot to temp file
-        with tempfile.NamedTemporaryFile(suffix='.png', delete=False) as tmp:
-            plt.figure(figsize=(12, 6))
-            plt.savefig(tmp.name, format='png', bbox_inches='tight', dpi=300)
-            plt.close()
+        img_data = io.BytesIO()
+        fig.savefig(img_data, format='png', bbox_inches='tight')
 
-        # Get PDF filename using save_to_pdf
-        filename = save_to_pdf(loan_details, tmp.name)
+        return base64.b64encode(img_data.getvalue()).decode()
 
-        # Read the PDF file and return its bytes
-        with open(filename, 'rb') as f:
-            pdf_bytes = f.read()
+    def generate_pdf(self, loan_details):
+        """Generate PDF report bytes using the report layout from loan_calculator."""
+        from loan_calculator import build_pdf
 
-        # Clean up files
-        os.remove(filename)
-        os.remove(tmp.name)
+        # Reuse the web chart when it has already been rendered
+        plot_data = loan_details.get('plot_data') or self.get_plot_data(loan_details)
+        plot = io.BytesIO(base64.b64decode(plot_data))
 
-        return pdf_bytes
+        return bytes(build_pdf(loan_details, plot).output())
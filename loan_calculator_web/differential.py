@@ -0,0 +1,395 @@
+"""
+Differential validation of the fast engines against the reference loop.
+
+Every engine is run on the same loan cases and compared field by field with
+``calculate_loan_payments``. For each field the report gives the maximum
+absolute and relative error and the case it occurred in. ``TOLERANCES``
+declares how far each engine may deviate: the cent engine rounds every
+month's interest, while the sensitivity pass, the vectorized simulators of
+the refinancing scanner and the repayment optimizer, and the browser
+calculator in ``docs/`` (exported to ``fixtures/js_golden.json`` by
+``fixtures/export_js_golden.js``) should agree to float precision.
+
+Cases are generated randomly from a seed, always including the edge cases of
+the reference loop: the last-month ``min()`` clamp of the principal, the
+extra payment capped at ``remaining_balance - principal_payment`` and a fixed
+period longer than the term.
+
+Usage:
+    python differential.py --cases 1000 --seed 1
+"""
+import argparse
+import json
+import math
+import os
+import random
+import sys
+
+import numpy as np
+
+from fixed_point import amortize_cents, calculate_loan_payments_cents
+from loan_calculator import calculate_loan_payments
+from refinance import MAX_MONTHS, scan_refinance_grid
+from repayment_optimizer import candidate_strategies, simulate_strategies
+from sensitivity import calculate_sensitivities
+
+
+TOTAL_FIELDS = ('term_months', 'total_payment', 'total_interest',
+                'fixed_period_interest', 'fixed_period_remaining')
+SCHEDULE_FIELDS = ('principal_payment', 'interest_payment', 'extra_payment', 'remaining_balance')
+
+GOLDEN_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'js_golden.json')
+
+# Allowed deviation from the reference per engine: a field passes if either
+# its absolute error (in euros or months) or its relative error is within
+# bounds. Relative errors are taken against max(|reference|, 1).
+TOLERANCES = {
+    # Rounding every month's interest lets balances drift from the float
+    # reference by a few cents per year; allow for terms of up to 100 years
+    'cents': {'abs': 2.0, 'rel': 1e-5, 'fields': {
+        'interest_payment': {'abs': 0.02, 'rel': 1e-5},
+        # The reference sometimes needs a trailing month for ~1e-12 EUR of
+        # float residue that the cent engine settles the month before
+        'term_months': {'abs': 1, 'rel': 0},
+    }},
+    'cents_batch': 'cents',
+    'refinance': {'abs': 1e-6, 'rel': 1e-9},
+    'optimizer': {'abs': 1e-6, 'rel': 1e-9},
+    'sensitivity': {'abs': 1e-6, 'rel': 1e-9, 'fields': {
+        # The continuous term cannot resolve the same trailing month
+        'term_months': {'abs': 1, 'rel': 0},
+    }},
+    'js': {'abs': 1e-6, 'rel': 1e-9, 'fields': {
+        # The browser stores the uncapped extra payment in the final month,
+        # so that row is left out of the comparison
+        'extra_payment': {'abs': 1e-6, 'rel': 1e-9, 'skip_final_row': True},
+    }},
+}
+
+# Loans that hit the reference loop's edge cases
+EDGE_CASES = [
+    # Fixed period longer than the term
+    {'loan_amount': 100000, 'annual_interest_rate': 3.0, 'monthly_payment': 1000,
+     'fixed_period_years': 15, 'include_extra': False},
+    # Extra payments pay the loan off before the fixed period ends
+    {'loan_amount': 100000, 'annual_interest_rate': 3.0, 'monthly_payment': 1000,
+     'fixed_period_years': 9, 'include_extra': True},
+    # Payment barely above the interest
+    {'loan_amount': 200000, 'annual_interest_rate': 4.0, 'monthly_payment': 700,
+     'fixed_period_years': 10, 'include_extra': False},
+    # Payoff within a year; the extra payment is capped by the balance
+    {'loan_amount': 5000, 'annual_interest_rate': 2.0, 'monthly_payment': 1000,
+     'fixed_period_years': None, 'include_extra': True},
+]
+
+
+def random_cases(n, seed=0):
+    """
+    Edge cases plus ``n`` random loans.
+
+    Args:
+        n (int): Number of random loans
+        seed (int): Seed for the random generator
+
+    Returns:
+        list: Cases as dicts with loan_amount, annual_interest_rate,
+        monthly_payment, fixed_period_years and include_extra
+    """
+    rng = random.Random(seed)
+    cases = [dict(case) for case in EDGE_CASES]
+    for _ in range(n):
+        loan_amount = round(rng.uniform(1000, 1000000), 2)
+        rate = round(rng.uniform(0.1, 12), 2)
+        minimum = loan_amount * rate / 1200
+        cases.append({
+            'loan_amount': loan_amount,
+            'annual_interest_rate': rate,
+            'monthly_payment': round(minimum * rng.uniform(1.02, 20), 2),
+            'fixed_period_years': rng.choice([None, rng.randint(1, 40)]),
+            'include_extra': rng.random() < 0.5,
+        })
+    return cases
+
+
+def golden_cases():
+    """Cases of the JS golden fixture."""
+    with open(GOLDEN_PATH) as f:
+        return [fixture['input'] for fixture in json.load(f)]
+
+
+def _case_args(case):
+    return (case['loan_amount'], case['annual_interest_rate'], case['monthly_payment'],
+            case['fixed_period_years'])
+
+
+def _normalize(loan_details):
+    """Totals and schedule columns of a calculate_loan_payments-style result."""
+    schedule = loan_details['amortization_schedule']
+    normalized = {
+        'term_months': len(schedule),
+        'total_payment': loan_details['total_payment'],
+        'total_interest': loan_details['total_interest'],
+        'fixed_period_interest': loan_details.get('fixed_period_interest', 0),
+        # The balance at the end of a fixed period past the term is zero
+        'fixed_period_remaining': loan_details.get('fixed_period_remaining', 0),
+        'month': np.array([row['month'] for row in schedule]),
+    }
+    for field in SCHEDULE_FIELDS:
+        normalized[field] = np.array([row[field] for row in schedule], dtype=np.float64)
+    return normalized
+
+
+def run_reference(cases):
+    return [_normalize(calculate_loan_payments(
+        *_case_args(case), include_extra_payment=case['include_extra'])) for case in cases]
+
+
+def run_cents(cases):
+    return [_normalize(calculate_loan_payments_cents(
+        *_case_args(case), include_extra_payment=case['include_extra'])) for case in cases]
+
+
+def run_cents_batch(cases):
+    batch = amortize_cents(
+        [case['loan_amount'] for case in cases],
+        [case['annual_interest_rate'] for case in cases],
+        [case['monthly_payment'] for case in cases],
+        [case['fixed_period_years'] or 0 for case in cases],
+        include_extra_payment=[case['include_extra'] for case in cases],
+        keep_schedule=True)
+
+    results = []
+    for i in range(len(cases)):
+        term = int(batch['term_months'][i])
+        result = {field: int(batch[field][i]) / 100 for field in TOTAL_FIELDS if field != 'term_months'}
+        result['term_months'] = term
+        result['month'] = np.arange(1, term + 1)
+        for field in SCHEDULE_FIELDS:
+            result[field] = batch[field][i, :term] / 100
+        results.append(result)
+    return results
+
+
+def run_sensitivity(cases):
+    results = []
+    for case in cases:
+        sensitivities = calculate_sensitivities(
+            *_case_args(case), include_extra_payment=case['include_extra'])
+        result = {'term_months': math.ceil(sensitivities['term_months']['value']),
+                  'total_interest': sensitivities['total_interest']['value']}
+        for field in ('fixed_period_interest', 'fixed_period_remaining'):
+            result[field] = sensitivities[field]['value'] if field in sensitivities else 0
+        results.append(result)
+    return results
+
+
+def _simulated(case):
+    """Whether the month-capped simulators model a case: no extra payments, at most MAX_MONTHS."""
+    if case['include_extra']:
+        return False
+    monthly_rate = (case['annual_interest_rate'] / 100) / 12
+    num_payments = np.log(case['monthly_payment'] / (
+        case['monthly_payment'] - case['loan_amount'] * monthly_rate)) / np.log(1 + monthly_rate)
+    return num_payments <= MAX_MONTHS - 1
+
+
+def run_refinance(cases):
+    """
+    Interest path of the refinancing scanner.
+
+    Refinancing at 0% without a fee saves exactly the interest of the
+    current loan, so the net savings of that grid point are its total interest.
+    """
+    results = []
+    for case in cases:
+        if not _simulated(case):
+            results.append(None)
+            continue
+        scan = scan_refinance_grid(
+            case['loan_amount'], case['annual_interest_rate'], case['monthly_payment'], [0.0], [0.0])
+        results.append({'total_interest': float(scan['net_savings'][0, 0, 0])})
+    return results
+
+
+def run_optimizer(cases):
+    """Multi-loan simulator with each case as a single loan and no surplus."""
+    results = []
+    for case in cases:
+        if not _simulated(case):
+            results.append(None)
+            continue
+        loans = [case]
+        batch = simulate_strategies(loans, candidate_strategies(loans, n_random=0)[:1], rollover=False)
+        results.append({'total_interest': float(batch['total_interest'][0]),
+                        'term_months': int(batch['months_to_debt_free'][0])})
+    return results
+
+
+def run_js(cases):
+    """Look up the cases in the JS golden fixture."""
+    with open(GOLDEN_PATH) as f:
+        fixtures = {json.dumps(fixture['input'], sort_keys=True): fixture['output']
+                    for fixture in json.load(f)}
+
+    results = []
+    for case in cases:
+        output = fixtures[json.dumps(case, sort_keys=True)]
+        result = {field: output[field] for field in TOTAL_FIELDS}
+        result['month'] = np.array([row['month'] for row in output['schedule']])
+        # The fixture keeps only every 12th month and the final one
+        result['sampled'] = True
+        for field in SCHEDULE_FIELDS:
+            result[field] = np.array([row[field] for row in output['schedule']], dtype=np.float64)
+        results.append(result)
+    return results
+
+
+ENGINES = {
+    'cents': run_cents,
+    'cents_batch': run_cents_batch,
+    'sensitivity': run_sensitivity,
+    'refinance': run_refinance,
+    'optimizer': run_optimizer,
+    'js': run_js,
+}
+
+
+def _errors(reference, candidate, field, skip_final_row=False):
+    """
+    Absolute and relative error of one field.
+
+    Schedules are aligned by month; a row missing from either schedule counts
+    with all its amounts compared to zero, so extra or missing months show up
+    as errors unless the row is (numerically) empty. Sampled schedules are
+    compared on the months they sample.
+    """
+    if field in SCHEDULE_FIELDS:
+        reference_months = reference['month']
+        if candidate.get('sampled'):
+            reference_months = _sample_months(reference_months)
+        months = np.union1d(reference_months, candidate['month'])
+        if skip_final_row:
+            months = months[months < min(reference['month'].max(initial=0),
+                                         candidate['month'].max(initial=0))]
+        if months.size == 0:
+            return 0.0, 0.0
+        expected = _by_month(reference, field, months)
+        actual = _by_month(candidate, field, months)
+    else:
+        expected = np.array([reference[field]], dtype=np.float64)
+        actual = np.array([candidate[field]], dtype=np.float64)
+
+    absolute = np.abs(actual - expected)
+    relative = absolute / np.maximum(np.abs(expected), 1.0)
+    return float(absolute.max()), float(relative.max())
+
+
+def _sample_months(months):
+    """The months a sampled schedule keeps: every 12th month and the final one."""
+    return months[(months % 12 == 0) | (months == months.max(initial=0))]
+
+
+def _by_month(result, field, months):
+    """Schedule column on the given months, zero where the schedule has no row."""
+    values = np.zeros(months.shape, dtype=np.float64)
+    present = np.isin(months, result['month'])
+    index = np.searchsorted(result['month'], months[present])
+    values[present] = result[field][index]
+    return values
+
+
+def differential_report(cases, engines=None):
+    """
+    Compare engines with the reference loop on the given cases.
+
+    Args:
+        cases (list): Loan cases, e.g. from ``random_cases`` or ``golden_cases``
+        engines (list, optional): Names from ENGINES (default: all but 'js')
+
+    Returns:
+        dict: {engine: {field: {'max_abs_error', 'max_rel_error', 'worst_case'}}}
+        for every field the engine produces. Engines skip cases they do not
+        model (e.g. extra payments) by returning None for them.
+    """
+    engines = engines or [name for name in ENGINES if name != 'js']
+    reference = run_reference(cases)
+
+    report = {}
+    for name in engines:
+        results = ENGINES[name](cases)
+        fields = {}
+        produced = next(result for result in results if result is not None)
+        for field in TOTAL_FIELDS + SCHEDULE_FIELDS:
+            if field not in produced:
+                continue
+            worst = {'max_abs_error': 0.0, 'max_rel_error': 0.0, 'worst_case': None}
+            for i, (expected, actual) in enumerate(zip(reference, results)):
+                if actual is None:
+                    continue
+                absolute, relative = _errors(expected, actual, field,
+                                             _bounds(name, field).get('skip_final_row', False))
+                if absolute > worst['max_abs_error']:
+                    worst['worst_case'] = cases[i]
+                worst['max_abs_error'] = max(worst['max_abs_error'], absolute)
+                worst['max_rel_error'] = max(worst['max_rel_error'], relative)
+            fields[field] = worst
+        report[name] = fields
+    return report
+
+
+def _bounds(engine, field):
+    declared = TOLERANCES[engine]
+    if isinstance(declared, str):
+        declared = TOLERANCES[declared]
+    return declared.get('fields', {}).get(field, declared)
+
+
+def tolerance(engine, field):
+    """Declared (absolute, relative) tolerance of an engine for a field."""
+    bounds = _bounds(engine, field)
+    return bounds['abs'], bounds['rel']
+
+
+def violations(report):
+    """Fields whose errors exceed the declared tolerances, as (engine, field, errors)."""
+    failed = []
+    for engine, fields in report.items():
+        for field, errors in fields.items():
+            max_abs, max_rel = tolerance(engine, field)
+            if errors['max_abs_error'] > max_abs and errors['max_rel_error'] > max_rel:
+                failed.append((engine, field, errors))
+    return failed
+
+
+def format_report(report):
+    """Format a differential report as a table."""
+    lines = [f"{'Engine':<12} | {'Field':<22} | {'Max abs error':>14} | {'Max rel error':>14} | Status",
+             "-" * 80]
+    failed = {(engine, field) for engine, field, _ in violations(report)}
+    for engine, fields in report.items():
+        for field, errors in fields.items():
+            status = 'FAIL' if (engine, field) in failed else 'ok'
+            lines.append(f"{engine:<12} | {field:<22} | {errors['max_abs_error']:>14.3e} | "
+                         f"{errors['max_rel_error']:>14.3e} | {status}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Compare the fast loan engines with the reference implementation.')
+    parser.add_argument('--cases', type=int, default=500, help='Number of random cases')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    random_report = differential_report(random_cases(args.cases, args.seed))
+    golden_report = differential_report(golden_cases(), ['js'])
+
+    print(f"Random cases ({args.cases} + {len(EDGE_CASES)} edge cases)")
+    print(format_report(random_report))
+    print(f"\nJS golden fixture ({len(golden_cases())} cases)")
+    print(format_report(golden_report))
+    return 1 if violations(random_report) or violations(golden_report) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
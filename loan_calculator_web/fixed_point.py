@@ -0,0 +1,284 @@
+"""
+Fixed-point amortization engine working in integer cents.
+
+Money is held as int64 cents in NumPy arrays and the monthly interest is
+rounded to whole cents with an explicit rounding mode, the way a bank
+statement does it, so totals reconcile to the cent instead of drifting like
+the float engine in loan_calculator. Interest is computed with integer
+arithmetic only: the annual rate is scaled to an integer number of
+1/10,000 percent, so ``balance * rate / 1200`` is an exact integer division.
+
+The engine is vectorized over loans: one call amortizes many loans at once,
+looping over months while every array operation covers all loans.
+"""
+import numpy as np
+
+
+# Annual rates are represented in units of 1/RATE_SCALE percent
+RATE_SCALE = 10_000
+_INTEREST_DENOMINATOR = 12 * 100 * RATE_SCALE
+
+# Share of the loan amount paid extra every 12th month, as in loan_calculator
+EXTRA_PAYMENT_SHARE = (5, 100)
+
+ROUNDING_MODES = ('half_even', 'half_up', 'down')
+
+
+def to_cents(amount):
+    """Convert euro amounts (scalar or array) to int64 cents."""
+    cents = np.rint(np.asarray(amount, dtype=np.float64) * 100)
+    # Check in float before casting, which would silently wrap around
+    if not np.all(np.abs(cents) < 2.0 ** 63):
+        raise ValueError("Amounts too large for integer-cent arithmetic")
+    return cents.astype(np.int64)
+
+
+def round_div(numerator, denominator, rounding='half_even'):
+    """
+    Divide non-negative integers and round the quotient to an integer.
+
+    Args:
+        numerator (np.ndarray or int): Non-negative int64 numerators or a Python int
+        denominator (int): Positive denominator
+        rounding (str): 'half_even' (banker's rounding), 'half_up' or 'down'
+
+    Returns:
+        np.ndarray or int: Rounded quotients, of the numerator's type
+    """
+    quotient, remainder = divmod(numerator, denominator)
+    if rounding == 'down':
+        return quotient
+    twice = 2 * remainder
+    if rounding == 'half_up':
+        return quotient + (twice >= denominator)
+    if rounding == 'half_even':
+        return quotient + ((twice > denominator) | ((twice == denominator) & (quotient % 2 == 1)))
+    raise ValueError(
+        f"Unknown rounding mode '{rounding}', expected one of: {', '.join(ROUNDING_MODES)}")
+
+
+def _term_months(loan_amounts, annual_interest_rates, monthly_payments):
+    """Number of scheduled payments, as ``calculate_loan_term`` rounds it up."""
+    if not (np.all(np.isfinite(loan_amounts)) and np.all(np.isfinite(monthly_payments))):
+        raise ValueError("Loan amounts and monthly payments must be finite")
+    if np.any(loan_amounts <= 0):
+        raise ValueError("Loan amounts must be positive")
+    if not np.all(np.isfinite(annual_interest_rates) & (annual_interest_rates > 0)):
+        raise ValueError("Interest rates must be finite and positive")
+    monthly_rates = (annual_interest_rates / 100) / 12
+    if np.any(monthly_payments <= loan_amounts * monthly_rates):
+        raise ValueError(
+            "Monthly payment too low - loan would never be paid off")
+    num_payments = np.log(monthly_payments / (monthly_payments - loan_amounts * monthly_rates)) \
+        / np.log(1 + monthly_rates)
+    if not np.all(np.isfinite(num_payments)):
+        raise ValueError("Loan term is not finite for these inputs")
+    return np.ceil(num_payments).astype(np.int64)
+
+
+def _check_interest_range(balance, rate_units):
+    """balance * rate_units is the largest intermediate of the interest; it must fit in int64."""
+    if balance * rate_units > np.iinfo(np.int64).max:
+        raise ValueError("Loan amount and interest rate too large for integer-cent arithmetic")
+
+
+def amortize_cents(loan_amounts, annual_interest_rates, monthly_payments,
+                   fixed_interest_period_years=None, include_extra_payment=False,
+                   rounding='half_even', keep_schedule=False, annual_extra_payments=None):
+    """
+    Amortize a batch of loans in integer cents.
+
+    Follows calculate_loan_payments month by month: the principal is capped
+    at the remaining balance, and every 12th month an extra payment of 5% of
+    the loan amount is made, capped at what is left after the regular
+    principal. The last scheduled payment settles any cents left over from
+    rounding, so every loan ends at exactly zero.
+
+    Args:
+        loan_amounts (array-like): Principal amounts in euros
+        annual_interest_rates (array-like): Annual interest rates (in percentage)
+        monthly_payments (array-like): Monthly payments in euros
+        fixed_interest_period_years (array-like, optional): Fixed interest period per loan in years
+        include_extra_payment (bool or array-like): Whether to make the annual extra payment
+        rounding (str): Rounding of the monthly interest, see ``round_div``
+        keep_schedule (bool): Also return the month-by-month schedule
+        annual_extra_payments (array-like, optional): Annual extra payment in euros
+            instead of 5% of the loan amount
+
+    Returns:
+        dict: Dictionary of int64 arrays (amounts in cents), one entry per loan:
+            - term_months: Number of payments until the loan is paid off
+            - total_interest: Total interest paid
+            - total_payment: Total principal and interest paid
+            - annual_extra_payment: Annual extra payment
+            - fixed_period_interest: Interest paid during the fixed period
+            - fixed_period_remaining: Remaining balance at the end of the fixed period
+            - principal_payment, interest_payment, extra_payment, remaining_balance:
+              (loans x months) schedules, only with keep_schedule
+    """
+    loan_amounts, annual_interest_rates, monthly_payments = np.broadcast_arrays(
+        np.atleast_1d(np.asarray(loan_amounts, dtype=np.float64)),
+        np.atleast_1d(np.asarray(annual_interest_rates, dtype=np.float64)),
+        np.atleast_1d(np.asarray(monthly_payments, dtype=np.float64)))
+    n_loans = loan_amounts.shape[0]
+
+    total_payments = _term_months(loan_amounts, annual_interest_rates, monthly_payments)
+    rate_units = np.rint(annual_interest_rates * RATE_SCALE).astype(np.int64)
+    payment_cents = to_cents(monthly_payments)
+    balance = to_cents(loan_amounts)
+    _check_interest_range(int(balance.max()), int(rate_units.max()))
+
+    include_extra = np.broadcast_to(np.asarray(include_extra_payment, dtype=bool), (n_loans,))
+    if annual_extra_payments is None:
+        annual_extra = round_div(balance * EXTRA_PAYMENT_SHARE[0], EXTRA_PAYMENT_SHARE[1], rounding)
+    else:
+        annual_extra = np.broadcast_to(to_cents(annual_extra_payments), (n_loans,))
+    annual_extra = np.where(include_extra, annual_extra, 0)
+
+    if fixed_interest_period_years is None:
+        fixed_months = np.zeros(n_loans, dtype=np.int64)
+    else:
+        fixed_months = np.broadcast_to(
+            np.asarray(fixed_interest_period_years, dtype=np.int64) * 12, (n_loans,))
+
+    n_months = int(total_payments.max())
+    term_months = np.zeros(n_loans, dtype=np.int64)
+    total_interest = np.zeros(n_loans, dtype=np.int64)
+    total_principal = np.zeros(n_loans, dtype=np.int64)
+    fixed_period_interest = np.zeros(n_loans, dtype=np.int64)
+    fixed_period_remaining = np.zeros(n_loans, dtype=np.int64)
+    if keep_schedule:
+        schedule = {name: np.zeros((n_loans, n_months), dtype=np.int64) for name in (
+            'principal_payment', 'interest_payment', 'extra_payment', 'remaining_balance')}
+
+    for month in range(1, n_months + 1):
+        active = balance > 0
+        if not active.any():
+            break
+
+        interest = np.where(active, round_div(balance * rate_units, _INTEREST_DENOMINATOR, rounding), 0)
+        principal = np.minimum(payment_cents - interest, balance)
+        # The last scheduled payment settles the rounding residue
+        principal = np.where(month == total_payments, balance, principal)
+
+        extra = np.zeros(n_loans, dtype=np.int64)
+        if month % 12 == 0:
+            extra = np.where(active, np.minimum(annual_extra, balance - principal), 0)
+        principal = np.where(active, principal + extra, 0)
+
+        balance = balance - principal
+        total_interest += interest
+        total_principal += principal
+        fixed_period_interest += np.where(month <= fixed_months, interest, 0)
+        fixed_period_remaining = np.where(month == fixed_months, balance, fixed_period_remaining)
+        term_months = np.where(active, month, term_months)
+
+        if keep_schedule:
+            schedule['principal_payment'][:, month - 1] = principal
+            schedule['interest_payment'][:, month - 1] = interest
+            schedule['extra_payment'][:, month - 1] = extra
+            schedule['remaining_balance'][:, month - 1] = balance
+
+    result = {
+        'term_months': term_months,
+        'total_interest': total_interest,
+        'total_payment': total_principal + total_interest,
+        'annual_extra_payment': annual_extra,
+        'fixed_period_interest': fixed_period_interest,
+        'fixed_period_remaining': fixed_period_remaining,
+    }
+    if keep_schedule:
+        result.update(schedule)
+    return result
+
+
+def calculate_loan_payments_cents(loan_amount, annual_interest_rate, monthly_payment,
+                                  fixed_interest_period_years=None, include_extra_payment=False,
+                                  rounding='half_even'):
+    """
+    Calculate loan payments and amortization schedule in integer cents.
+
+    Drop-in counterpart of ``loan_calculator.calculate_loan_payments``: the
+    result has the same keys, with amounts in euros that are exact to the cent,
+    plus a ``cents`` entry holding the totals as integers.
+
+    Args:
+        loan_amount (float): Principal amount of the loan
+        annual_interest_rate (float): Annual interest rate (in percentage)
+        monthly_payment (float): Monthly payment amount
+        fixed_interest_period_years (int, optional): Length of fixed interest period in years
+        include_extra_payment (bool): Whether to include annual extra payment of 5% of loan amount
+        rounding (str): Rounding of the monthly interest, see ``round_div``
+
+    Returns:
+        dict: Loan details as returned by ``calculate_loan_payments``
+    """
+    # A single loan is amortized with Python ints: as exact as amortize_cents
+    # and without the per-month overhead of NumPy calls on length-1 arrays
+    total_payments = int(_term_months(
+        np.atleast_1d(np.float64(loan_amount)),
+        np.atleast_1d(np.float64(annual_interest_rate)),
+        np.atleast_1d(np.float64(monthly_payment)))[0])
+    rate_units = int(np.rint(annual_interest_rate * RATE_SCALE))
+    payment = int(to_cents(monthly_payment))
+    balance = int(to_cents(loan_amount))
+    _check_interest_range(balance, rate_units)
+
+    annual_extra = 0
+    if include_extra_payment:
+        annual_extra = round_div(balance * EXTRA_PAYMENT_SHARE[0], EXTRA_PAYMENT_SHARE[1], rounding)
+    fixed_months = fixed_interest_period_years * 12 if fixed_interest_period_years is not None else 0
+
+    total_interest = total_principal = fixed_period_interest = fixed_period_remaining = 0
+    amortization_schedule = []
+    for month in range(1, total_payments + 1):
+        if balance <= 0:
+            break
+
+        interest = round_div(balance * rate_units, _INTEREST_DENOMINATOR, rounding)
+        # The last scheduled payment settles the rounding residue
+        principal = balance if month == total_payments else min(payment - interest, balance)
+        extra = min(annual_extra, balance - principal) if month % 12 == 0 else 0
+        principal += extra
+
+        balance -= principal
+        total_interest += interest
+        total_principal += principal
+        if month <= fixed_months:
+            fixed_period_interest += interest
+        if month == fixed_months:
+            fixed_period_remaining = balance
+
+        amortization_schedule.append({
+            'month': month,
+            'principal_payment': principal / 100,
+            'interest_payment': interest / 100,
+            'remaining_balance': balance / 100,
+            'extra_payment': extra / 100,
+        })
+
+    cents = {
+        'total_payment': total_principal + total_interest,
+        'total_interest': total_interest,
+        'fixed_period_interest': fixed_period_interest,
+        'annual_extra_payment': annual_extra,
+    }
+    result = {
+        'loan_amount': loan_amount,
+        'annual_interest_rate': annual_interest_rate,
+        'monthly_payment': monthly_payment,
+        'total_payment': cents['total_payment'] / 100,
+        'total_interest': cents['total_interest'] / 100,
+        'fixed_period_interest': cents['fixed_period_interest'] / 100,
+        'annual_extra_payment': cents['annual_extra_payment'] / 100,
+        'amortization_schedule': amortization_schedule,
+        'rounding': rounding,
+        'cents': cents,
+    }
+
+    # Calculate remaining loan amount after fixed interest period if specified
+    if fixed_interest_period_years is not None and fixed_months <= total_payments:
+        cents['fixed_period_remaining'] = fixed_period_remaining
+        result['fixed_period_remaining'] = fixed_period_remaining / 100
+
+    return result
@@ -0,0 +1,71 @@
+// Export golden fixtures from the browser loan calculator in docs/.
+//
+// Runs calculateLoanPayments from docs/loan-calculator/js/calculator.js under
+// Node for a fixed set of cases and writes inputs and outputs to
+// js_golden.json, which differential.py compares the Python engines against.
+//
+// Usage (from loan_calculator_web/): node fixtures/export_js_golden.js
+const fs = require('fs');
+const path = require('path');
+const vm = require('vm');
+
+const source = fs.readFileSync(
+    path.join(__dirname, '..', '..', 'docs', 'loan-calculator', 'js', 'calculator.js'), 'utf8');
+const context = { document: { addEventListener() {} }, console, Math };
+vm.createContext(context);
+vm.runInContext(source, context);
+
+// Deterministic cases: hand-picked edge cases plus seeded random loans
+const cases = [
+    // Fixed period longer than the term
+    { loan_amount: 100000, annual_interest_rate: 3.0, monthly_payment: 1000, fixed_period_years: 15, include_extra: false },
+    // Extra payments pay the loan off before the fixed period ends
+    { loan_amount: 100000, annual_interest_rate: 3.0, monthly_payment: 1000, fixed_period_years: 9, include_extra: true },
+    // Payment barely above the interest
+    { loan_amount: 200000, annual_interest_rate: 4.0, monthly_payment: 700, fixed_period_years: 10, include_extra: false },
+    // Payoff within a single year
+    { loan_amount: 5000, annual_interest_rate: 2.0, monthly_payment: 1000, fixed_period_years: null, include_extra: true },
+];
+
+let seed = 20240601;
+function random() {
+    // Park-Miller minimal standard generator
+    seed = (seed * 48271) % 2147483647;
+    return seed / 2147483647;
+}
+while (cases.length < 24) {
+    const loanAmount = Math.round(20000 + random() * 480000);
+    const rate = Math.round((0.5 + random() * 7) * 100) / 100;
+    const minimum = loanAmount * rate / 1200;
+    const payment = Math.round(minimum * (1.15 + random() * 3));
+    cases.push({
+        loan_amount: loanAmount,
+        annual_interest_rate: rate,
+        monthly_payment: payment,
+        fixed_period_years: random() < 0.7 ? 5 + Math.floor(random() * 16) : null,
+        include_extra: random() < 0.5,
+    });
+}
+
+const fixtures = cases.map(input => {
+    const result = context.calculateLoanPayments(
+        input.loan_amount, input.annual_interest_rate, input.monthly_payment,
+        0.05, input.fixed_period_years, input.include_extra);
+    const schedule = result.amortization_schedule;
+    // Keep the file small: every 12th month plus the final month
+    const rows = schedule.filter((row, i) => row.month % 12 === 0 || i === schedule.length - 1);
+    return {
+        input,
+        output: {
+            term_months: schedule.length,
+            total_payment: result.total_payment,
+            total_interest: result.total_interest,
+            fixed_period_interest: result.fixed_period_interest,
+            fixed_period_remaining: result.fixed_period_remaining,
+            schedule: rows,
+        },
+    };
+});
+
+fs.writeFileSync(path.join(__dirname, 'js_golden.json'), JSON.stringify(fixtures, null, 1) + '\n');
+console.log(`Wrote ${fixtures.length} cases to fixtures/js_golden.json`);
@@ -0,0 +1,279 @@
+"""
+Load generator for the loan calculator web app.
+
+Drives ``/calculate`` and ``/generate_pdf`` with a configurable number of
+concurrent clients, scenario mix and PDF ratio, either in-process through the
+Flask test client or against a running server, and reports throughput,
+latency percentiles, error rates and worker RSS over time.
+
+Usage:
+    python load_test.py --concurrency 8 --duration 30 --pdf-ratio 0.2
+    python load_test.py --url http://127.0.0.1:8000 --server-pid 1234 --mix long=3,short=1
+
+To compare worker models, run the same mix against e.g.
+``gunicorn -w 4 app:app`` (processes) and ``gunicorn -w 1 --threads 4 app:app``
+(threads) and pass the gunicorn master's pid as ``--server-pid``.
+"""
+import argparse
+import http.cookiejar
+import json
+import os
+import random
+import sys
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+
+import numpy as np
+
+
+# Form inputs for /calculate, keyed by scenario name
+SCENARIOS = {
+    'short': {
+        'property_value': 150000,
+        'own_funds': 50000,
+        'annual_interest_rate': 3.0,
+        'monthly_payment': 2500,
+        'fixed_period': '',
+    },
+    'long': {
+        'property_value': 500000,
+        'own_funds': 100000,
+        'annual_interest_rate': 4.0,
+        'monthly_payment': 1600,
+        'fixed_period': '10',
+        'include_extra': 'true',
+    },
+}
+
+
+class InProcessClient:
+    """Sends requests through the Flask test client of ``app.py``."""
+
+    def __init__(self):
+        from app import app
+        self._client = app.test_client()
+
+    def post(self, path, data):
+        response = self._client.post(path, data=data)
+        response.get_data()
+        return response.status_code
+
+
+class HttpClient:
+    """Sends requests to a running server, keeping the session cookie."""
+
+    def __init__(self, base_url, timeout=60):
+        self._base_url = base_url.rstrip('/')
+        self._timeout = timeout
+        self._opener = urllib.request.build_opener(
+            urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()))
+
+    def post(self, path, data):
+        body = urllib.parse.urlencode(data).encode()
+        try:
+            with self._opener.open(self._base_url + path, data=body, timeout=self._timeout) as response:
+                response.read()
+                return response.status
+        except urllib.error.HTTPError as e:
+            return e.code
+
+
+def rss_bytes(pid):
+    """
+    Resident set size of a process and all its descendants.
+
+    Args:
+        pid (int): Process id of e.g. the gunicorn master
+
+    Returns:
+        int or None: RSS in bytes, or None if /proc is not available
+    """
+    page_size = os.sysconf('SC_PAGE_SIZE')
+    total = 0
+    pending = [pid]
+    while pending:
+        current = pending.pop()
+        try:
+            with open(f'/proc/{current}/statm') as f:
+                total += int(f.read().split()[1]) * page_size
+        except (OSError, IndexError, ValueError):
+            if current == pid:
+                return None
+            continue
+        try:
+            for task in os.listdir(f'/proc/{current}/task'):
+                with open(f'/proc/{current}/task/{task}/children') as f:
+                    pending.extend(int(child) for child in f.read().split())
+        except OSError:
+            pass
+    return total
+
+
+def parse_mix(text):
+    """Parse a scenario mix such as ``long=3,short=1`` into weights."""
+    mix = {}
+    for part in text.split(','):
+        name, _, weight = part.partition('=')
+        name = name.strip()
+        if name not in SCENARIOS:
+            raise ValueError(
+                f"Unknown scenario '{name}', expected one of: {', '.join(SCENARIOS)}")
+        mix[name] = float(weight) if weight else 1.0
+    return mix
+
+
+def _worker(client, deadline, mix, pdf_ratio, rng, samples):
+    names = list(mix)
+    weights = [mix[name] for name in names]
+    while time.perf_counter() < deadline:
+        scenario = SCENARIOS[rng.choices(names, weights)[0]]
+        requests = [('/calculate', scenario)]
+        if rng.random() < pdf_ratio:
+            requests.append(('/generate_pdf', {}))
+
+        for path, data in requests:
+            start = time.perf_counter()
+            try:
+                status = client.post(path, data)
+            except Exception:
+                status = None
+            samples.append((path, time.perf_counter() - start,
+                            status is not None and status < 400))
+
+
+def run_load_test(client_factory, concurrency=4, duration=10.0, mix=None, pdf_ratio=0.1,
+                  rss_pid=None, sample_interval=1.0, seed=0):
+    """
+    Run the load test and collect latency and memory samples.
+
+    Args:
+        client_factory (callable): Returns a new client with ``post(path, data)``
+        concurrency (int): Number of concurrent client threads
+        duration (float): Length of the run in seconds
+        mix (dict, optional): Scenario name to relative weight (default: all equal)
+        pdf_ratio (float): Probability of requesting a PDF after each calculation
+        rss_pid (int, optional): Process whose RSS (with children) is sampled
+        sample_interval (float): Seconds between RSS samples
+        seed (int): Seed for the scenario choice of each client
+
+    Returns:
+        dict: Dictionary containing:
+            - duration_seconds: Actual wall-clock duration
+            - endpoints: Per-endpoint count, errors, error_rate, throughput and p50/p95/p99 latency (ms)
+            - rss: List of (elapsed seconds, RSS bytes) samples
+    """
+    mix = mix or {name: 1.0 for name in SCENARIOS}
+    clients = [client_factory() for _ in range(concurrency)]
+    samples = []
+    rss = []
+
+    start = time.perf_counter()
+    deadline = start + duration
+    threads = [
+        threading.Thread(target=_worker, args=(
+            client, deadline, mix, pdf_ratio, random.Random(seed + i), samples))
+        for i, client in enumerate(clients)
+    ]
+    for thread in threads:
+        thread.start()
+
+    while any(thread.is_alive() for thread in threads):
+        if rss_pid is not None:
+            value = rss_bytes(rss_pid)
+            if value is not None:
+                rss.append((time.perf_counter() - start, value))
+        for thread in threads:
+            thread.join(timeout=sample_interval / len(threads))
+
+    elapsed = time.perf_counter() - start
+
+    endpoints = {}
+    for path in sorted({path for path, _, _ in samples}):
+        latencies = np.array([latency for p, latency, _ in samples if p == path]) * 1000
+        errors = sum(1 for p, _, ok in samples if p == path and not ok)
+        p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+        endpoints[path] = {
+            'count': len(latencies),
+            'errors': errors,
+            'error_rate': errors / len(latencies),
+            'throughput': len(latencies) / elapsed,
+            'p50_ms': float(p50),
+            'p95_ms': float(p95),
+            'p99_ms': float(p99),
+        }
+
+    return {
+        'duration_seconds': elapsed,
+        'endpoints': endpoints,
+        'rss': rss,
+    }
+
+
+def format_report(results):
+    """Format load test results as a human-readable table."""
+    lines = [
+        f"Duration: {results['duration_seconds']:.1f}s",
+        f"{'Endpoint':<15} | {'Requests':>8} | {'Req/s':>7} | {'Errors':>7} | "
+        f"{'p50 ms':>8} | {'p95 ms':>8} | {'p99 ms':>8}",
+        "-" * 80,
+    ]
+    for path, stats in results['endpoints'].items():
+        lines.append(
+            f"{path:<15} | {stats['count']:>8} | {stats['throughput']:>7.1f} | "
+            f"{stats['error_rate']:>7.1%} | {stats['p50_ms']:>8.1f} | "
+            f"{stats['p95_ms']:>8.1f} | {stats['p99_ms']:>8.1f}")
+
+    if results['rss']:
+        values = [value for _, value in results['rss']]
+        lines.append(
+            f"\nRSS: start {values[0] / 2**20:.1f} MB, peak {max(values) / 2**20:.1f} MB, "
+            f"end {values[-1] / 2**20:.1f} MB")
+        for elapsed, value in results['rss']:
+            lines.append(f"  {elapsed:7.1f}s  {value / 2**20:8.1f} MB")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Load test /calculate and /generate_pdf of the loan calculator.')
+    parser.add_argument('--url', help='Base URL of a running server (default: in-process test client)')
+    parser.add_argument('--server-pid', type=int,
+                        help='Pid of the server whose RSS to sample (default: this process when in-process)')
+    parser.add_argument('--concurrency', type=int, default=4, help='Concurrent clients')
+    parser.add_argument('--duration', type=float, default=10.0, help='Duration in seconds')
+    parser.add_argument('--mix', default=','.join(SCENARIOS),
+                        help="Scenario weights, e.g. 'long=3,short=1'")
+    parser.add_argument('--pdf-ratio', type=float, default=0.1,
+                        help='Fraction of calculations followed by a PDF download')
+    parser.add_argument('--sample-interval', type=float, default=1.0,
+                        help='Seconds between RSS samples')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', action='store_true', help='Print results as JSON')
+    args = parser.parse_args(argv)
+
+    if args.url:
+        client_factory = lambda: HttpClient(args.url)
+        rss_pid = args.server_pid
+    else:
+        client_factory = InProcessClient
+        rss_pid = args.server_pid or os.getpid()
+
+    results = run_load_test(
+        client_factory,
+        concurrency=args.concurrency,
+        duration=args.duration,
+        mix=parse_mix(args.mix),
+        pdf_ratio=args.pdf_ratio,
+        rss_pid=rss_pid,
+        sample_interval=args.sample_interval,
+        seed=args.seed,
+    )
+    print(json.dumps(results, indent=2) if args.json else format_report(results))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
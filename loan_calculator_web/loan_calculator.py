@@ -21,8 +21,17 @@ class LoanPDF(FPDF):
         self.cell(w, h, txt, border, ln, align, fill)
 
 
-def save_to_pdf(loan_details, plot_path):
-    """Save loan details and plot to a PDF file."""
+def build_pdf(loan_details, plot_path):
+    """
+    Build the PDF report for the loan details without writing it to disk.
+
+    Args:
+        loan_details (dict): Dictionary containing loan calculation results
+        plot_path (str or file-like): PNG image of the amortization plot
+
+    Returns:
+        LoanPDF: The rendered report, ready for ``output()``
+    """
     # Create PDF with A4 format and UTF-8 support
     pdf = LoanPDF()
     pdf.set_auto_page_break(auto=True, margin=15)
@@ -180,13 +189,25 @@ def save_to_pdf(loan_details, plot_path):
     img_h = img_w * 0.5  # Maintain 2:1 aspect ratio
     pdf.image(plot_path, x=pdf.l_margin, y=30, w=img_w, h=img_h)
 
-    # Save the PDF
-    filename = f'amount_{np.int32(loan_details["loan_amount"])}_{datetime.now().strftime("%Y%m%d_%H%M%S")}.pdf'
-    pdf.output(filename)
-    print(f'\nReport saved as: {filename}')
+    return pdf
 
-    # Clean up the temporary plot file
-    os.remove(plot_path)
+
+def save_to_pdf(loan_details, plot_path, filename=None):
+    """Save loan details and plot to a PDF file."""
+    try:
+        pdf = build_pdf(loan_details, plot_path)
+
+        # Save the PDF
+        if filename is None:
+            filename = f'amount_{np.int32(loan_details["loan_amount"])}_{datetime.now().strftime("%Y%m%d_%H%M%S")}.pdf'
+        pdf.output(filename)
+        print(f'\nReport saved as: {filename}')
+    finally:
+        # Clean up the temporary plot file, also when rendering fails
+        if os.path.exists(plot_path):
+            os.remove(plot_path)
+
+    return filename
 
 
 def format_currency(amount, for_pdf=False):
@@ -228,57 +249,59 @@ def plot_loan_burndown(loan_details, save_to_file=None):
         cumulative_interest.append(total_interest)
 
     # Create the plot
-    plt.figure(figsize=(12, 6))
-
-    # Plot remaining balance
-    plt.plot(months, balances, 'b-', label='Remaining Balance', linewidth=2)
-
-    # Plot cumulative payments (stacked area)
-    plt.fill_between(months, cumulative_principal, alpha=0.3,
-                     color='g', label='Principal Paid')
-    plt.fill_between(months, cumulative_interest, alpha=0.3,
-                     color='r', label='Interest Paid')
-
-    # Plot extra payments as markers
-    extra_payment_months = []
-    extra_payment_amounts = []
-    for payment in loan_details['amortization_schedule']:
-        if payment['extra_payment'] > 0:
-            extra_payment_months.append(payment['month'])
-            extra_payment_amounts.append(
-                payment['remaining_balance'] + payment['extra_payment'])
-
-    if extra_payment_months:
-        plt.scatter(extra_payment_months, extra_payment_amounts,
-                    color='yellow', edgecolor='black', s=100,
-                    label='Extra Payments', zorder=5)
-
-    # Customize the plot
-    plt.title('Loan Amortization Over Time')
-    plt.xlabel('Month')
-    plt.ylabel('Amount (€)')
-    plt.grid(True, linestyle='--', alpha=0.7)
-    plt.legend()
-
-    # Format y-axis with euro symbol
-    plt.gca().yaxis.set_major_formatter(
-        plt.FuncFormatter(lambda x, p: f'€{x:,.0f}'))
-
-    # Add fixed period marker if applicable
-    if 'fixed_period_remaining' in loan_details:
-        fixed_period_months = len(
-            months) // (len(months) // 12) * loan_details.get('fixed_period_years', 0)
-        if fixed_period_months > 0:
-            plt.axvline(x=fixed_period_months, color='purple', linestyle='--',
-                        label='End of Fixed Period')
-            plt.legend()
-
-    plt.tight_layout()
-    if save_to_file:
-        plt.savefig(save_to_file, bbox_inches='tight', dpi=300)
-        plt.close()
-    else:
-        plt.show()
+    fig = plt.figure(figsize=(12, 6))
+    try:
+        # Plot remaining balance
+        plt.plot(months, balances, 'b-', label='Remaining Balance', linewidth=2)
+
+        # Plot cumulative payments (stacked area)
+        plt.fill_between(months, cumulative_principal, alpha=0.3,
+                         color='g', label='Principal Paid')
+        plt.fill_between(months, cumulative_interest, alpha=0.3,
+                         color='r', label='Interest Paid')
+
+        # Plot extra payments as markers
+        extra_payment_months = []
+        extra_payment_amounts = []
+        for payment in loan_details['amortization_schedule']:
+            if payment['extra_payment'] > 0:
+                extra_payment_months.append(payment['month'])
+                extra_payment_amounts.append(
+                    payment['remaining_balance'] + payment['extra_payment'])
+
+        if extra_payment_months:
+            plt.scatter(extra_payment_months, extra_payment_amounts,
+                        color='yellow', edgecolor='black', s=100,
+                        label='Extra Payments', zorder=5)
+
+        # Customize the plot
+        plt.title('Loan Amortization Over Time')
+        plt.xlabel('Month')
+        plt.ylabel('Amount (€)')
+        plt.grid(True, linestyle='--', alpha=0.7)
+        plt.legend()
+
+        # Format y-axis with euro symbol
+        plt.gca().yaxis.set_major_formatter(
+            plt.FuncFormatter(lambda x, p: f'€{x:,.0f}'))
+
+        # Add fixed period marker if applicable
+        if 'fixed_period_remaining' in loan_details:
+            fixed_period_months = len(
+                months) // (len(months) // 12) * loan_details.get('fixed_period_years', 0)
+            if fixed_period_months > 0:
+                plt.axvline(x=fixed_period_months, color='purple', linestyle='--',
+                            label='End of Fixed Period')
+                plt.legend()
+
+        plt.tight_layout()
+        if save_to_file:
+            plt.savefig(save_to_file, bbox_inches='tight', dpi=300)
+        else:
+            plt.show()
+    finally:
+        # Close the figure even if rendering fails
+        plt.close(fig)
 
 
 def display_loan_summary(loan_details):
@@ -412,6 +435,53 @@ def calculate_loan_term(loan_amount, annual_interest_rate, monthly_payment):
     return num_payments / 12
 
 
+def solve_monthly_payment(loan_amount, annual_interest_rate, term_months,
+                          fixed_interest_period_years=None, include_extra_payment=False):
+    """
+    Find the smallest monthly payment, to the cent, that pays the loan off in time.
+
+    Without extra payments this is the annuity formula rounded up to the
+    cent; with them, the payment is bisected against the amortization
+    schedule of calculate_loan_payments.
+
+    Args:
+        loan_amount (float): Principal amount of the loan
+        annual_interest_rate (float): Annual interest rate (in percentage)
+        term_months (int): Number of months in which the loan must be paid off
+        fixed_interest_period_years (int, optional): Length of fixed interest period in years
+        include_extra_payment (bool): Whether to include annual extra payment of 5% of loan amount
+
+    Returns:
+        float: Monthly payment amount
+    """
+    if term_months < 1:
+        raise ValueError("Loan term must be at least one month")
+    if loan_amount <= 0 or annual_interest_rate <= 0:
+        raise ValueError("Loan amount and interest rate must be positive")
+
+    def months_needed(payment_cents):
+        schedule = calculate_loan_payments(
+            loan_amount, annual_interest_rate, payment_cents / 100,
+            fixed_interest_period_years, include_extra_payment)['amortization_schedule']
+        return len(schedule)
+
+    # Any payment up to the monthly interest never pays the loan off
+    monthly_rate = (annual_interest_rate / 100) / 12
+    low = int(np.floor(loan_amount * monthly_rate * 100))
+    annuity = loan_amount * monthly_rate / (1 - (1 + monthly_rate) ** -term_months)
+    high = int(np.ceil(annuity * 100)) + 1
+    while months_needed(high) > term_months:
+        low, high = high, 2 * high
+
+    while high - low > 1:
+        middle = (low + high) // 2
+        if middle > loan_amount * monthly_rate * 100 and months_needed(middle) <= term_months:
+            high = middle
+        else:
+            low = middle
+    return high / 100
+
+
 def calculate_loan_payments(loan_amount, annual_interest_rate, monthly_payment, fixed_interest_period_years=None, include_extra_payment=False):
     """
     Calculate loan payments and amortization schedule.
@@ -507,9 +577,12 @@ def calculate_loan_payments(loan_amount, annual_interest_rate, monthly_payment,
     # Calculate remaining loan amount after fixed interest period if specified
     if fixed_interest_period_years is not None:
         fixed_period_months = fixed_interest_period_years * 12
-        if fixed_period_months <= total_payments:
+        if fixed_period_months <= len(amortization_schedule):
             result['fixed_period_remaining'] = amortization_schedule[fixed_period_months -
                                                                      1]['remaining_balance']
+        elif fixed_period_months <= total_payments:
+            # Extra payments paid the loan off before the fixed period ended
+            result['fixed_period_remaining'] = 0
 
     return result
 
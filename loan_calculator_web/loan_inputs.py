@@ -0,0 +1,81 @@
+"""
+Loan input parsing shared by batch_reports and api.
+
+Both take loans as records (CSV rows or JSON objects) with the fields
+``loan_amount``, ``annual_interest_rate`` and ``monthly_payment``, plus the
+optional ``id``, ``fixed_period_years``, ``include_extra``,
+``property_value`` and ``own_funds``. ``WARM_UP_LOAN`` is the record each
+tool runs through its own render path to warm up its worker processes.
+"""
+import math
+
+
+REQUIRED_FIELDS = ('loan_amount', 'annual_interest_rate', 'monthly_payment')
+TRUE_VALUES = ('1', 'true', 'yes', 'y')
+
+WARM_UP_LOAN = {
+    'id': 'warm-up',
+    'loan_amount': 10000.0,
+    'annual_interest_rate': 3.0,
+    'monthly_payment': 500.0,
+    'fixed_period_years': 1,
+    'include_extra': True,
+}
+
+
+def parse_bool(value):
+    """Interpret a boolean field given as a bool or as text such as 'true' or '1'."""
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() in TRUE_VALUES
+
+
+def parse_float(value, field):
+    """Convert a field to float, rejecting NaN and infinities such as JSON's 1e400."""
+    number = float(value)
+    if not math.isfinite(number):
+        raise ValueError(f"{field} must be a finite number")
+    return number
+
+
+def parse_int(value, field):
+    """Convert a field to int, rejecting NaN and infinities."""
+    if isinstance(value, float):
+        parse_float(value, field)
+    return int(value)
+
+
+def parse_loan(record, index=0):
+    """
+    Normalize one input record into a loan dictionary.
+
+    Args:
+        record (dict): CSV row or JSON object
+        index (int): Position of the record in the input, for messages and the default id
+
+    Returns:
+        dict: Loan with id, loan_amount, annual_interest_rate, monthly_payment,
+        fixed_period_years, include_extra and, if given, property_value and own_funds
+    """
+    if not isinstance(record, dict):
+        raise ValueError(f"Loan #{index + 1} must be an object")
+    missing = [field for field in REQUIRED_FIELDS
+               if record.get(field) in (None, '')]
+    if missing:
+        raise ValueError(
+            f"Loan #{index + 1} is missing required fields: {', '.join(missing)}")
+
+    fixed_period = record.get('fixed_period_years')
+    loan = {
+        'id': str(record.get('id') or index + 1),
+        'loan_amount': parse_float(record['loan_amount'], 'loan_amount'),
+        'annual_interest_rate': parse_float(record['annual_interest_rate'], 'annual_interest_rate'),
+        'monthly_payment': parse_float(record['monthly_payment'], 'monthly_payment'),
+        'fixed_period_years': (parse_int(fixed_period, 'fixed_period_years')
+                               if fixed_period not in (None, '') else None),
+        'include_extra': parse_bool(record.get('include_extra', False)),
+    }
+    for optional in ('property_value', 'own_funds'):
+        if record.get(optional) not in (None, ''):
+            loan[optional] = parse_float(record[optional], optional)
+    return loan
@@ -0,0 +1,129 @@
+"""
+Per-request memory accounting and leak detection for the Flask app.
+
+Two independent guards are installed on the app:
+
+- Memory accounting (opt-in, ``MEMORY_TRACKING = True``) traces every request
+  with ``tracemalloc`` and records per-endpoint peak and net memory plus the
+  top allocation sites. ``/metrics/memory`` serves them as JSON; it is only
+  registered if tracking is on when the tracker is installed, and as it shows
+  source paths and line numbers, tracking should stay off on public
+  deployments. When ``MEMORY_BUDGETS`` maps an endpoint to a byte budget,
+  exceeding it raises ``MemoryBudgetExceeded`` in testing mode and logs a
+  warning otherwise.
+- The leak guard (opt-in, ``LEAK_GUARD = True``) checks after each request
+  for matplotlib figures left open in pyplot. The web code paths render
+  charts and reports in memory and write no files, so there is no file check.
+
+tracemalloc and pyplot's figure list are process-wide, so with several
+requests in flight on threads of the same worker their allocations and
+figures are attributed to each other (and the leak guard closes figures
+another thread still uses). Both guards are only meaningful with a single
+request at a time (e.g. in tests).
+"""
+import threading
+import tracemalloc
+
+import matplotlib.pyplot as plt
+from flask import g, jsonify, request
+
+
+class MemoryBudgetExceeded(Exception):
+    """Raised in testing mode when a request exceeds its endpoint's memory budget."""
+
+
+class MemoryTracker:
+    def __init__(self, app=None, top_n=10):
+        self.top_n = top_n
+        self._lock = threading.Lock()
+        self._stats = {}
+        self.app = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('MEMORY_TRACKING', False)
+        app.config.setdefault('MEMORY_BUDGETS', {})
+        app.config.setdefault('LEAK_GUARD', False)
+        self.app = app
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        app.teardown_request(self._teardown_request)
+        if app.config['MEMORY_TRACKING']:
+            app.add_url_rule('/metrics/memory', 'memory_metrics', self.metrics_view)
+
+    def _endpoint_stats(self, endpoint):
+        return self._stats.setdefault(endpoint, {
+            'requests': 0,
+            'peak_bytes_max': 0,
+            'peak_bytes_last': 0,
+            'net_bytes_total': 0,
+            'leaked_figures': 0,
+            'top_allocations': [],
+        })
+
+    def _before_request(self):
+        if self.app.config['MEMORY_TRACKING']:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+            tracemalloc.reset_peak()
+            g._memory_snapshot = tracemalloc.take_snapshot()
+            g._memory_start = tracemalloc.get_traced_memory()[0]
+
+    def _after_request(self, response):
+        if '_memory_snapshot' not in g or not tracemalloc.is_tracing():
+            return response
+
+        current, peak = tracemalloc.get_traced_memory()
+        peak_bytes = peak - g._memory_start
+        top = tracemalloc.take_snapshot().compare_to(g._memory_snapshot, 'lineno')
+        top_allocations = [
+            {'site': str(stat.traceback), 'size_bytes': stat.size_diff, 'count': stat.count_diff}
+            for stat in top if stat.size_diff > 0
+        ][:self.top_n]
+        del g._memory_snapshot
+
+        endpoint = request.endpoint or request.path
+        with self._lock:
+            stats = self._endpoint_stats(endpoint)
+            stats['requests'] += 1
+            stats['peak_bytes_last'] = peak_bytes
+            stats['net_bytes_total'] += current - g._memory_start
+            if peak_bytes >= stats['peak_bytes_max']:
+                stats['peak_bytes_max'] = peak_bytes
+                stats['top_allocations'] = top_allocations
+
+        budget = self.app.config['MEMORY_BUDGETS'].get(endpoint)
+        if budget is not None and peak_bytes > budget:
+            message = (f"Endpoint '{endpoint}' peaked at {peak_bytes:,} bytes, "
+                       f"over its budget of {budget:,} bytes")
+            if self.app.testing:
+                raise MemoryBudgetExceeded(message)
+            self.app.logger.warning(message)
+
+        return response
+
+    def _teardown_request(self, exc):
+        if not self.app.config['LEAK_GUARD']:
+            return
+
+        leaked_figures = plt.get_fignums()
+        if leaked_figures:
+            self.app.logger.warning(
+                f"{len(leaked_figures)} matplotlib figure(s) left open by {request.path}")
+            for number in leaked_figures:
+                plt.close(number)
+            with self._lock:
+                stats = self._endpoint_stats(request.endpoint or request.path)
+                stats['leaked_figures'] += len(leaked_figures)
+
+    def metrics(self):
+        """Per-endpoint memory statistics collected so far."""
+        with self._lock:
+            return {
+                'tracking': self.app.config['MEMORY_TRACKING'],
+                'endpoints': {endpoint: dict(stats) for endpoint, stats in self._stats.items()},
+            }
+
+    def metrics_view(self):
+        return jsonify(self.metrics())
@@ -0,0 +1,182 @@
+"""
+Refinancing break-even scanner.
+
+At the end of the fixed interest period the remaining balance can either
+continue at the follow-up rate or be refinanced at a new rate for a one-off
+fee. Both options start from the same balance, so after ``m`` months the
+refinanced borrower is ahead by the difference in cumulative interest minus
+the fee. The scanner evaluates that for a whole grid of new rates, fees and
+(optionally) new monthly payments in one vectorized pass and returns, per
+grid point, the month in which refinancing breaks even and the net savings
+over the life of the loan.
+"""
+import numpy as np
+
+
+# Upper bound on the simulated horizon
+MAX_MONTHS = 100 * 12
+
+# Upper bound on simulated (payment, rate) points times simulated months
+MAX_GRID_MONTHS = 5_000_000
+
+
+def payoff_months(balance, annual_interest_rates, monthly_payments):
+    """
+    Months needed to pay off a balance for a grid of rates and payments.
+
+    Args:
+        balance (float): Balance to pay off
+        annual_interest_rates (array-like): Annual interest rates (in percentage)
+        monthly_payments (array-like): Monthly payments
+
+    Returns:
+        numpy.ndarray: (payments, rates) array of months, inf where the
+        payment does not cover the first month's interest
+    """
+    monthly_rates = (np.asarray(annual_interest_rates, dtype=np.float64) / 100) / 12
+    payments = np.asarray(monthly_payments, dtype=np.float64)[:, None]
+    interest = balance * monthly_rates
+    with np.errstate(divide='ignore', invalid='ignore'):
+        months = np.where(monthly_rates > 0,
+                          np.log(payments / (payments - interest)) / np.log1p(monthly_rates),
+                          balance / payments)
+    return np.where(payments > interest, np.ceil(months), np.inf)
+
+
+def scan_refinance_grid(balance, current_rate, current_payment, new_rates, fees, new_payments=None):
+    """
+    Break-even month and net savings of refinancing for every grid point.
+
+    Args:
+        balance (float): Remaining balance at the end of the fixed period
+        current_rate (float): Annual interest rate when not refinancing (in percentage)
+        current_payment (float): Monthly payment when not refinancing
+        new_rates (array-like): Candidate annual interest rates (in percentage)
+        fees (array-like): Candidate one-off refinancing fees
+        new_payments (array-like, optional): Candidate monthly payments after
+            refinancing (default: keep the current payment)
+
+    Returns:
+        dict: Dictionary of arrays indexed [payment, rate, fee]:
+            - break_even_month: First month in which refinancing is ahead, or -1 if never
+            - net_savings: Interest saved over the life of the loan minus the fee
+            - new_rates, fees, new_payments: The grid axes
+    """
+    new_rates = np.atleast_1d(np.asarray(new_rates, dtype=np.float64))
+    fees = np.atleast_1d(np.asarray(fees, dtype=np.float64))
+    if new_payments is None:
+        new_payments = [current_payment]
+    new_payments = np.atleast_1d(np.asarray(new_payments, dtype=np.float64))
+
+    if current_payment <= balance * (current_rate / 100) / 12:
+        raise ValueError(
+            "Monthly payment too low - loan would never be paid off")
+
+    # Payments that cannot pay off the new loan within the horizon never
+    # break even; leave them out of the simulation instead of running them
+    # for MAX_MONTHS
+    shape = (new_payments.shape[0], new_rates.shape[0])
+    months = payoff_months(balance, new_rates, new_payments).ravel()
+    feasible = months <= MAX_MONTHS
+    horizon = min(max(payoff_months(balance, [current_rate], [current_payment]).item(),
+                      months[feasible].max(initial=0)), MAX_MONTHS)
+    if np.count_nonzero(feasible) * horizon > MAX_GRID_MONTHS:
+        raise ValueError("Refinancing grid is too large for the remaining term")
+
+    monthly_rates = np.broadcast_to((new_rates / 100) / 12, shape).ravel()
+    payments = np.broadcast_to(new_payments[:, None], shape).ravel()
+    balances = np.where(feasible, float(balance), 0.0)
+    total_interest = np.zeros_like(balances)
+    current_monthly_rate = (current_rate / 100) / 12
+    current_balance = float(balance)
+    current_interest = 0.0
+
+    # Break-even months against the fees in ascending order: once the running
+    # savings first reach a fee, every cheaper fee has been reached as well,
+    # so each point only records the fees between its previous and its new
+    # searchsorted position
+    order = np.argsort(fees, kind='stable')
+    sorted_fees = fees[order]
+    reached = np.zeros(balances.shape, dtype=np.int64)
+    break_even = np.full((balances.shape[0], fees.shape[0]), -1, dtype=np.int64)
+
+    for month in range(1, MAX_MONTHS + 1):
+        interest = balances * monthly_rates
+        principal = np.minimum(payments - interest, balances)
+        balances = balances - principal
+        total_interest = total_interest + interest
+
+        interest = current_balance * current_monthly_rate
+        current_balance -= min(current_payment - interest, current_balance)
+        current_interest += interest
+
+        # How far ahead refinancing is, before the fee
+        savings = current_interest - total_interest
+        count = np.searchsorted(sorted_fees, savings, side='right')
+        grew = np.flatnonzero(count > reached)
+        if grew.size:
+            start, stop = reached[grew], count[grew]
+            lengths = stop - start
+            offsets = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+            break_even[np.repeat(grew, lengths), np.repeat(start, lengths) + offsets] = month
+            reached[grew] = stop
+        if current_balance <= 0 and not (balances > 0).any():
+            break
+
+    break_even[:, order] = break_even.copy()
+    net_savings = savings[:, None] - fees[None, :]
+
+    # A payment that never amortizes the new loan cannot break even
+    paid_off = (feasible & (balances <= 0))[:, None]
+    break_even = np.where(paid_off, break_even, -1).reshape(shape + fees.shape)
+    net_savings = np.where(paid_off, net_savings, np.nan).reshape(shape + fees.shape)
+
+    return {
+        'break_even_month': break_even,
+        'net_savings': net_savings,
+        'new_rates': new_rates,
+        'fees': fees,
+        'new_payments': new_payments,
+    }
+
+
+def refinance_scan(loan_details, new_rates, fees, new_payments=None, current_rate=None):
+    """
+    Scan refinancing options at the end of a loan's fixed interest period.
+
+    Args:
+        loan_details (dict): Result of calculate_loan_payments with a fixed period
+        new_rates (array-like): Candidate annual interest rates (in percentage)
+        fees (array-like): Candidate one-off refinancing fees
+        new_payments (array-like, optional): Candidate monthly payments after refinancing
+        current_rate (float, optional): Follow-up rate when not refinancing
+            (default: the loan's current rate)
+
+    Returns:
+        dict: JSON-serializable scan with the balance, the grid axes and the
+        break_even_month and net_savings surfaces as nested lists indexed
+        [payment][rate][fee] (None where refinancing never breaks even)
+    """
+    if 'fixed_period_remaining' not in loan_details:
+        raise ValueError("Refinancing needs a fixed interest period within the loan term")
+
+    balance = loan_details['fixed_period_remaining']
+    current_rate = loan_details['annual_interest_rate'] if current_rate is None else current_rate
+    scan = scan_refinance_grid(
+        balance, current_rate, loan_details['monthly_payment'], new_rates, fees, new_payments)
+
+    break_even = scan['break_even_month'].astype(object)
+    break_even[scan['break_even_month'] < 0] = None
+    net_savings = scan['net_savings'].astype(object)
+    net_savings[np.isnan(scan['net_savings'])] = None
+
+    return {
+        'balance': balance,
+        'current_rate': current_rate,
+        'monthly_payment': loan_details['monthly_payment'],
+        'new_rates': scan['new_rates'].tolist(),
+        'fees': scan['fees'].tolist(),
+        'new_payments': scan['new_payments'].tolist(),
+        'break_even_month': break_even.tolist(),
+        'net_savings': net_savings.tolist(),
+    }
@@ -0,0 +1,214 @@
+"""
+Sensitivities of the loan totals to the rate, the payment and the extra payment.
+
+``calculate_sensitivities`` runs the amortization recurrence of
+``calculate_loan_payments`` once in forward mode: alongside every balance and
+interest value it carries the derivatives with respect to the three inputs,
+so "what does 0.1% more interest do" is answered without re-running the
+schedule. ``tornado`` evaluates finite up/down steps of each input as one
+batched run of the fixed-point engine.
+"""
+import numpy as np
+
+from fixed_point import RATE_SCALE, amortize_cents
+from loan_calculator import calculate_loan_term
+
+
+# Inputs the sensitivities are taken with respect to, in gradient order
+PARAMETERS = ('annual_interest_rate', 'monthly_payment', 'annual_extra_payment')
+
+# Default step sizes for the tornado chart
+DEFAULT_STEPS = {
+    'annual_interest_rate': 0.1,
+    'monthly_payment': 100.0,
+    'annual_extra_payment': 1000.0,
+}
+
+_RATE, _PAYMENT, _EXTRA = (np.eye(len(PARAMETERS))[i] for i in range(len(PARAMETERS)))
+
+
+def calculate_sensitivities(loan_amount, annual_interest_rate, monthly_payment,
+                            fixed_interest_period_years=None, include_extra_payment=False,
+                            annual_extra_payment=None):
+    """
+    Derivatives of the loan totals by forward-mode propagation through the schedule.
+
+    Every derivative follows the branch the schedule actually takes, i.e. the
+    last-month clamp of the principal to the remaining balance and the cap of
+    the extra payment at what is left. The term is made continuous by counting
+    the final payment as the fraction of a full month's principal it needs.
+    Derivatives with respect to the extra payment describe the December extra
+    payment even when ``include_extra_payment`` is off (i.e. starting one).
+
+    Args:
+        loan_amount (float): Principal amount of the loan
+        annual_interest_rate (float): Annual interest rate (in percentage)
+        monthly_payment (float): Monthly payment amount
+        fixed_interest_period_years (int, optional): Length of fixed interest period in years
+        include_extra_payment (bool): Whether to include the annual extra payment
+        annual_extra_payment (float, optional): Annual extra payment (default: 5% of loan amount)
+
+    Returns:
+        dict: Dictionary keyed by 'total_interest', 'term_months',
+        'fixed_period_interest' (with a fixed period) and
+        'fixed_period_remaining' (with a fixed period within the term, as in
+        calculate_loan_payments). Each entry holds the value
+        and its derivative per percentage point of rate, per euro of monthly
+        payment and per euro of annual extra payment.
+    """
+    monthly_rate = (annual_interest_rate / 100) / 12
+    loan_term_years = calculate_loan_term(
+        loan_amount, annual_interest_rate, monthly_payment)
+    total_payments = int(np.ceil(loan_term_years * 12))
+
+    if annual_extra_payment is None:
+        annual_extra_payment = loan_amount * 0.05
+    if not include_extra_payment:
+        annual_extra_payment = 0
+    fixed_period_months = (fixed_interest_period_years * 12
+                           if fixed_interest_period_years is not None else 0)
+
+    balance, d_balance = loan_amount, np.zeros(len(PARAMETERS))
+    total_interest, d_total_interest = 0, np.zeros(len(PARAMETERS))
+    fixed_interest, d_fixed_interest = 0, np.zeros(len(PARAMETERS))
+    fixed_remaining = None
+    term, d_term = 0, np.zeros(len(PARAMETERS))
+
+    for month in range(1, total_payments + 1):
+        interest = balance * monthly_rate
+        d_interest = d_balance * monthly_rate + balance * _RATE / 1200
+
+        if month <= fixed_period_months:
+            fixed_interest += interest
+            d_fixed_interest = d_fixed_interest + d_interest
+
+        # Regular principal, clamped to the remaining balance in the last month
+        capacity, d_capacity = monthly_payment - interest, _PAYMENT - d_interest
+        if capacity < balance:
+            principal, d_principal = capacity, d_capacity
+        else:
+            principal, d_principal = balance, d_balance
+
+        extra, d_extra = 0, np.zeros(len(PARAMETERS))
+        if month % 12 == 0 and balance > 0:
+            capacity, d_capacity = capacity + annual_extra_payment, d_capacity + _EXTRA
+            if annual_extra_payment < balance - principal:
+                extra, d_extra = annual_extra_payment, _EXTRA
+            else:
+                extra, d_extra = balance - principal, d_balance - d_principal
+
+        # Same order of float operations as calculate_loan_payments
+        principal, d_principal = principal + extra, d_principal + d_extra
+        previous_balance, d_previous_balance = balance, d_balance
+        balance = max(0, balance - principal)
+        d_balance = d_balance - d_principal if balance > 0 else np.zeros(len(PARAMETERS))
+
+        total_interest += interest
+        d_total_interest = d_total_interest + d_interest
+
+        if month == fixed_period_months:
+            fixed_remaining, d_fixed_remaining = balance, d_balance
+
+        if balance == 0 or month == total_payments:
+            # Share of a full month's principal that the final payment needs
+            fraction = previous_balance / capacity
+            d_fraction = (d_previous_balance * capacity - previous_balance * d_capacity) / capacity ** 2
+            term, d_term = month - 1 + fraction, d_fraction
+            break
+
+    def entry(value, gradient):
+        return {'value': float(value),
+                **{name: float(g) for name, g in zip(PARAMETERS, gradient)}}
+
+    result = {
+        'total_interest': entry(total_interest, d_total_interest),
+        'term_months': entry(term, d_term),
+    }
+    if fixed_interest_period_years is not None:
+        result['fixed_period_interest'] = entry(fixed_interest, d_fixed_interest)
+    if fixed_interest_period_years is not None and fixed_period_months <= total_payments:
+        if fixed_remaining is None:
+            # Paid off before the end of the fixed period
+            fixed_remaining, d_fixed_remaining = 0, np.zeros(len(PARAMETERS))
+        result['fixed_period_remaining'] = entry(fixed_remaining, d_fixed_remaining)
+    return result
+
+
+def tornado(loan_amount, annual_interest_rate, monthly_payment,
+            fixed_interest_period_years=None, include_extra_payment=False, steps=None):
+    """
+    Effect of a step down and up in each input on the loan totals.
+
+    The base case and all stepped scenarios are amortized together in one
+    batched run of the fixed-point engine. Steps that would leave the loan
+    unpayable are clipped to the nearest input that still pays it off: the
+    rate stays positive and below what the payment covers, the payment stays
+    above the first month's interest and the extra payment at or above zero.
+
+    Args:
+        loan_amount (float): Principal amount of the loan
+        annual_interest_rate (float): Annual interest rate (in percentage)
+        monthly_payment (float): Monthly payment amount
+        fixed_interest_period_years (int, optional): Length of fixed interest period in years
+        include_extra_payment (bool): Whether the annual extra payment of 5% is made
+        steps (dict, optional): Step size per parameter (default: DEFAULT_STEPS)
+
+    Returns:
+        dict: Dictionary containing:
+            - base: total_interest, term_months and fixed_period_remaining of the base case
+            - bars: One entry per parameter with its step, the clipped low_input
+              and high_input and the base, low and high values of each total
+    """
+    steps = dict(DEFAULT_STEPS, **(steps or {}))
+    base_extra = loan_amount * 0.05 if include_extra_payment else 0.0
+
+    # Smallest rate the cent engine represents, the highest rate and the
+    # lowest payment (to the cent) that still pay the loan off
+    min_rate = 1 / RATE_SCALE
+    max_rate = np.floor(monthly_payment * 1200 / loan_amount * RATE_SCALE - 1) / RATE_SCALE
+    min_payment = np.floor(loan_amount * annual_interest_rate / 1200 * 100 + 1) / 100
+    bounds = {
+        'annual_interest_rate': (min_rate, max(max_rate, annual_interest_rate)),
+        'monthly_payment': (min(min_payment, monthly_payment), np.inf),
+        'annual_extra_payment': (0.0, np.inf),
+    }
+
+    scenarios = [(annual_interest_rate, monthly_payment, base_extra)]
+    for index, name in enumerate(PARAMETERS):
+        lower, upper = bounds[name]
+        for sign in (-1, 1):
+            scenario = list(scenarios[0])
+            scenario[index] = float(np.clip(scenario[index] + sign * steps[name], lower, upper))
+            scenarios.append(tuple(scenario))
+    rates, payments, extras = (np.array(column) for column in zip(*scenarios))
+
+    batch = amortize_cents(
+        loan_amount, rates, payments,
+        fixed_interest_period_years,
+        include_extra_payment=extras > 0,
+        annual_extra_payments=extras)
+
+    totals = {
+        'total_interest': batch['total_interest'] / 100,
+        'term_months': batch['term_months'].astype(np.float64),
+        'fixed_period_remaining': batch['fixed_period_remaining'] / 100,
+    }
+    if fixed_interest_period_years is None:
+        del totals['fixed_period_remaining']
+
+    bars = []
+    for index, name in enumerate(PARAMETERS):
+        low, high = 1 + 2 * index, 2 + 2 * index
+        bars.append({
+            'parameter': name,
+            'step': steps[name],
+            'low_input': scenarios[low][index],
+            'high_input': scenarios[high][index],
+            **{key: {'base': float(values[0]), 'low': float(values[low]), 'high': float(values[high])}
+               for key, values in totals.items()},
+        })
+
+    return {
+        'base': {key: float(values[0]) for key, values in totals.items()},
+        'bars': bars,
+    }
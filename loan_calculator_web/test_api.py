@@ -0,0 +1,158 @@
+import asyncio
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from api import LoanAPI
+from loan_calculator import calculate_loan_payments
+
+LOAN = {'loan_amount': 250000, 'annual_interest_rate': 3.5, 'monthly_payment': 1200,
+        'fixed_period_years': 10, 'include_extra': True}
+
+
+class GatedExecutor(ThreadPoolExecutor):
+    """Thread pool whose jobs wait for ``gate`` and that counts submissions."""
+
+    def __init__(self):
+        super().__init__(max_workers=2)
+        self.gate = threading.Event()
+        self.submitted = 0
+
+    def submit(self, fn, *args):
+        self.submitted += 1
+
+        def gated():
+            self.gate.wait(10)
+            return fn(*args)
+        return super().submit(gated)
+
+
+async def call(api, path, payload, method='POST'):
+    body = payload if isinstance(payload, bytes) else json.dumps(payload).encode()
+    sent = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': body, 'more_body': False}
+
+    async def send(message):
+        sent.append(message)
+
+    await api({'type': 'http', 'method': method, 'path': path}, receive, send)
+    headers = dict(sent[0]['headers'])
+    return sent[0]['status'], headers, b''.join(message.get('body', b'') for message in sent[1:])
+
+
+def test_calculate_solve_and_export():
+    api = LoanAPI(executor=ThreadPoolExecutor(max_workers=2))
+
+    async def scenario():
+        return (await call(api, '/api/calculate', LOAN),
+                await call(api, '/api/solve', {'loan_amount': 100000, 'annual_interest_rate': 3,
+                                               'term_months': 120}),
+                await call(api, '/api/export', LOAN),
+                await call(api, '/api/calculate', dict(LOAN, monthly_payment=100)),
+                await call(api, '/api/calculate', LOAN, method='GET'))
+
+    calculated, solved, exported, too_low, wrong_method = asyncio.run(scenario())
+    api.close()
+
+    expected = calculate_loan_payments(250000, 3.5, 1200, 10, include_extra_payment=True)
+    assert calculated[0] == 200
+    assert json.loads(calculated[2])['total_interest'] == expected['total_interest']
+
+    assert solved[0] == 200
+    solution = json.loads(solved[2])
+    assert solution['monthly_payment'] == 965.61
+    assert solution['term_months'] == 120
+
+    assert exported[0] == 200
+    assert exported[1][b'content-type'] == b'application/pdf'
+    assert exported[2].startswith(b'%PDF')
+
+    assert too_low[0] == 400
+    assert 'too low' in json.loads(too_low[2])['error']
+    assert wrong_method[0] == 405
+
+
+def test_identical_requests_share_one_computation_and_overload_is_rejected():
+    executor = GatedExecutor()
+    api = LoanAPI(executor=executor, max_pending=1)
+
+    async def scenario():
+        identical = [asyncio.ensure_future(call(api, '/api/calculate', LOAN)) for _ in range(5)]
+        await asyncio.sleep(0.05)
+        rejected = await call(api, '/api/calculate', dict(LOAN, monthly_payment=1300))
+        executor.gate.set()
+        return await asyncio.gather(*identical), rejected
+
+    identical, rejected = asyncio.run(scenario())
+    api.close()
+
+    assert executor.submitted == 1
+    assert {status for status, _, _ in identical} == {200}
+    assert len({body for _, _, body in identical}) == 1
+    assert api.stats == {'computed': 1, 'coalesced': 4, 'rejected': 1}
+
+    assert rejected[0] == 429
+    assert rejected[1][b'retry-after'] == b'1'
+
+
+def test_batch_streams_results_in_input_order():
+    api = LoanAPI(executor=ThreadPoolExecutor(max_workers=2), max_pending=2, batch_window=3)
+    loans = [dict(LOAN, id=f'loan-{i}', monthly_payment=1000 + 50 * i) for i in range(8)]
+    loans.insert(3, {'loan_amount': 1000})
+
+    status, headers, body = asyncio.run(call(api, '/api/batch', {'loans': loans}))
+    api.close()
+
+    assert status == 200
+    assert headers[b'content-type'] == b'application/x-ndjson'
+    lines = [json.loads(line) for line in body.decode().splitlines()]
+    assert [line['index'] for line in lines] == list(range(9))
+    assert 'missing required fields' in lines[3]['error']
+    assert lines[4]['id'] == 'loan-3'
+    assert lines[4]['result']['monthly_payment'] == 1150
+
+
+def test_non_finite_numbers_are_rejected():
+    api = LoanAPI(executor=ThreadPoolExecutor(max_workers=2))
+
+    async def scenario():
+        return (await call(api, '/api/calculate', b'{"loan_amount": 100000, "annual_interest_rate": 3, '
+                                                  b'"monthly_payment": 1000, "fixed_period_years": 1e400}'),
+                await call(api, '/api/calculate', b'{"loan_amount": 1e400, "annual_interest_rate": 3, '
+                                                  b'"monthly_payment": 1000}'),
+                await call(api, '/api/solve', b'{"loan_amount": 100000, "annual_interest_rate": 3, '
+                                              b'"term_months": 1e400}'),
+                await call(api, '/api/batch', {'loans': [dict(LOAN, id='nan', monthly_payment='nan'),
+                                                         dict(LOAN, id='low', monthly_payment=100)]}))
+
+    fixed_period, amount, term, batch = asyncio.run(scenario())
+    api.close()
+
+    assert [response[0] for response in (fixed_period, amount, term)] == [400, 400, 400]
+    assert 'finite' in json.loads(amount[2])['error']
+    unparsed, failed = [json.loads(line) for line in batch[2].decode().splitlines()]
+    assert unparsed == {'index': 0, 'error': 'monthly_payment must be a finite number'}
+    # Loans that fail after parsing keep their id on the error line
+    assert failed['id'] == 'low'
+    assert 'too low' in failed['error']
+
+
+def test_batch_reports_worker_failures_per_line():
+    from concurrent.futures.process import BrokenProcessPool
+
+    class BrokenExecutor(ThreadPoolExecutor):
+        def submit(self, fn, *args):
+            def broken():
+                raise BrokenProcessPool('A worker process terminated abruptly')
+            return super().submit(broken)
+
+    api = LoanAPI(executor=BrokenExecutor(max_workers=1))
+    status, _, body = asyncio.run(call(api, '/api/batch', {'loans': [LOAN, dict(LOAN, monthly_payment=1300)]}))
+    api.close()
+
+    assert status == 200
+    lines = [json.loads(line) for line in body.decode().splitlines()]
+    assert [line['index'] for line in lines] == [0, 1]
+    assert all(line['error'].startswith('BrokenProcessPool') for line in lines)
@@ -0,0 +1,225 @@
+import tracemalloc
+
+import matplotlib.pyplot as plt
+import numpy as np
+import pytest
+
+from app import WARM_UP_SCENARIO, app, loan_calculator, memory_tracker, warm_up
+
+
+def test_warm_up_exercises_render_paths():
+    assert warm_up() > 0
+    assert plt.get_fignums() == []
+    # Both templates are compiled and cached on the Jinja environment
+    assert app.jinja_env.cache is not None
+    assert len(app.jinja_env.cache) >= 2
+
+
+def test_post_fork_skips_inherited_warm_up(monkeypatch):
+    import logging
+    from types import SimpleNamespace
+    import app as app_module
+
+    calls = []
+    monkeypatch.setattr(app_module, '_warmed_up', True)
+    monkeypatch.setattr(app_module, 'warm_up', lambda: calls.append(1) or 0.0)
+    server = SimpleNamespace(log=logging.getLogger('test'))
+
+    app_module.post_fork(server, SimpleNamespace(pid=1))
+    assert calls == []
+
+
+def test_generate_pdf_returns_report_bytes():
+    loan_details = loan_calculator.calculate_loan_payments(
+        100000, WARM_UP_SCENARIO['annual_interest_rate'], 1000)
+    loan_details['original_term_months'] = loan_calculator.calculate_loan_term(
+        100000, WARM_UP_SCENARIO['annual_interest_rate'], 1000) * 12
+
+    assert loan_calculator.generate_pdf(loan_details).startswith(b'%PDF')
+
+
+def test_pdf_after_calculate_uses_small_session():
+    client = app.test_client()
+    response = client.post('/calculate', data={
+        'property_value': 300000, 'own_funds': 60000, 'annual_interest_rate': 3.5,
+        'monthly_payment': 1200, 'fixed_period': '10', 'include_extra': 'true'})
+    assert response.status_code == 200
+    assert len(response.headers['Set-Cookie']) < 4093
+
+    response = client.post('/generate_pdf')
+    assert response.status_code == 200
+    assert response.data.startswith(b'%PDF')
+
+
+def test_memory_tracking_reports_peak_and_enforces_budget():
+    from memory_tracking import MemoryBudgetExceeded
+
+    app.config.update(TESTING=True, MEMORY_TRACKING=True, MEMORY_BUDGETS={})
+    try:
+        client = app.test_client()
+        form = {'property_value': 200000, 'own_funds': 50000,
+                'annual_interest_rate': 3.0, 'monthly_payment': 1000}
+        assert client.post('/calculate', data=form).status_code == 200
+
+        # The app was set up with tracking off, so the endpoint is not exposed
+        assert client.get('/metrics/memory').status_code == 404
+        stats = memory_tracker.metrics()['endpoints']['calculate']
+        assert stats['requests'] == 1
+        assert stats['peak_bytes_max'] > 0
+        assert stats['top_allocations']
+
+        app.config['MEMORY_BUDGETS'] = {'calculate': 1024}
+        with pytest.raises(MemoryBudgetExceeded):
+            client.post('/calculate', data=form)
+    finally:
+        app.config.update(TESTING=False, MEMORY_TRACKING=False, MEMORY_BUDGETS={})
+        tracemalloc.stop()
+
+
+def test_leak_guard_closes_figures():
+    from flask import Flask
+    from memory_tracking import MemoryTracker
+
+    leaky_app = Flask(__name__)
+    leaky_app.config['LEAK_GUARD'] = True
+    tracker = MemoryTracker(leaky_app)
+
+    @leaky_app.route('/leak')
+    def leak():
+        plt.figure()
+        return 'ok'
+
+    assert leaky_app.test_client().get('/leak').status_code == 200
+    assert plt.get_fignums() == []
+    stats = tracker.metrics()['endpoints']['leak']
+    assert stats['leaked_figures'] == 1
+
+
+def test_memory_metrics_endpoint_only_with_tracking():
+    from flask import Flask
+    from memory_tracking import MemoryTracker
+
+    tracked_app = Flask(__name__)
+    tracked_app.config['MEMORY_TRACKING'] = True
+    MemoryTracker(tracked_app)
+    try:
+        response = tracked_app.test_client().get('/metrics/memory')
+        assert response.status_code == 200
+        assert response.get_json()['tracking'] is True
+    finally:
+        tracemalloc.stop()
+
+
+def test_leak_guard_is_opt_in():
+    from flask import Flask
+    from memory_tracking import MemoryTracker
+
+    quiet_app = Flask(__name__)
+    tracker = MemoryTracker(quiet_app)
+
+    @quiet_app.route('/figure')
+    def figure():
+        plt.figure()
+        return 'ok'
+
+    try:
+        assert quiet_app.test_client().get('/figure').status_code == 200
+        assert len(plt.get_fignums()) == 1
+        assert tracker.metrics()['endpoints'] == {}
+    finally:
+        plt.close('all')
+
+
+def test_sensitivity_endpoint_returns_derivatives_and_tornado():
+    client = app.test_client()
+    response = client.post('/sensitivity', data={
+        'property_value': 300000, 'own_funds': 60000, 'annual_interest_rate': 3.5,
+        'monthly_payment': 1200, 'fixed_period': '10', 'include_extra': 'true',
+        'monthly_payment_step': '50'})
+    assert response.status_code == 200
+    data = response.get_json()
+
+    total_interest = data['sensitivities']['total_interest']
+    assert total_interest['annual_interest_rate'] > 0
+    assert total_interest['monthly_payment'] < 0
+    assert total_interest['annual_extra_payment'] < 0
+
+    bars = {bar['parameter']: bar for bar in data['tornado']['bars']}
+    assert bars['monthly_payment']['step'] == 50
+    assert bars['annual_interest_rate']['total_interest']['high'] > data['tornado']['base']['total_interest']
+    assert data['plot_data']
+
+    response = client.post('/sensitivity', data={
+        'property_value': 300000, 'own_funds': 60000, 'annual_interest_rate': 3.5,
+        'monthly_payment': 500})
+    assert response.status_code == 400
+
+
+def test_sensitivity_endpoint_clips_steps_near_the_interest():
+    # EUR 240k at 3.5% costs EUR 700 interest a month; the default payment
+    # step of 100 would take the EUR 750 payment below it
+    response = app.test_client().post('/sensitivity', data={
+        'property_value': 300000, 'own_funds': 60000, 'annual_interest_rate': 3.5,
+        'monthly_payment': 750, 'annual_interest_rate_step': '5'})
+    assert response.status_code == 200
+    data = response.get_json()
+
+    assert data['sensitivities']['total_interest']['value'] > 0
+    bars = {bar['parameter']: bar for bar in data['tornado']['bars']}
+    assert bars['monthly_payment']['low_input'] == 700.01
+    assert 0 < bars['annual_interest_rate']['low_input'] < 3.5
+    assert 3.5 < bars['annual_interest_rate']['high_input'] < 3.75
+    assert bars['monthly_payment']['total_interest']['low'] > bars['monthly_payment']['total_interest']['base']
+
+
+def test_refinance_endpoint_returns_break_even_grid():
+    client = app.test_client()
+    form = {
+        'property_value': 300000, 'own_funds': 60000, 'annual_interest_rate': 3.5,
+        'monthly_payment': 1200, 'fixed_period': '10',
+        'rate_min': '2.5', 'rate_max': '4.5', 'rate_step': '0.5',
+        'fee_min': '0', 'fee_max': '2000', 'fee_step': '1000', 'heatmap': 'true'}
+    response = client.post('/refinance', data=form)
+    assert response.status_code == 200
+    scan = response.get_json()
+
+    assert scan['new_rates'] == [2.5, 3.0, 3.5, 4.0, 4.5]
+    assert scan['fees'] == [0.0, 1000.0, 2000.0]
+    break_even = scan['break_even_month'][0]
+    # Cheaper rates break even, later for higher fees; dearer rates never do
+    assert break_even[0][0] <= break_even[0][1] <= break_even[0][2]
+    assert break_even[4] == [None, None, None]
+    assert scan['net_savings'][0][0][0] > scan['net_savings'][0][0][2] > 0
+    assert scan['plot_data']
+
+    del form['fixed_period']
+    assert client.post('/refinance', data=form).status_code == 400
+
+    # Oversized grids are rejected before they are built
+    for grid in ({'rate_min': '0', 'rate_max': '1000000', 'rate_step': '0.000001'},
+                 {'fee_min': '0', 'fee_max': 'inf', 'fee_step': '1'},
+                 {'fee_min': '10', 'fee_max': '0', 'fee_step': '1'},
+                 {'rate_min': '0.1', 'rate_max': '10.0989', 'rate_step': '0.0001'},
+                 {'rate_min': '0.1', 'rate_max': '10', 'rate_step': '0.01',
+                  'fee_min': '0', 'fee_max': '5000', 'fee_step': '500'}):
+        response = client.post('/refinance', data=dict(form, fixed_period='10', **grid))
+        assert response.status_code == 400
+
+
+def test_refinance_scan_skips_infeasible_payments_and_caps_grid_months():
+    from refinance import scan_refinance_grid
+
+    scan = scan_refinance_grid(100000, 4.0, 800, [3.0, 6.0], [1000, 0, 500], new_payments=[400, 1000])
+    break_even, net_savings = scan['break_even_month'], scan['net_savings']
+    # 400/month does not cover the interest at 6%
+    assert (break_even[0, 1] == -1).all()
+    assert np.isnan(net_savings[0, 1]).all()
+    # Unsorted fees still break even in fee order
+    assert break_even[1, 0, 1] <= break_even[1, 0, 2] <= break_even[1, 0, 0]
+    # Lower payments at 3% break even early but pay more interest in the end
+    assert (break_even[0, 0] > 0).all()
+    assert (net_savings[0, 0] < 0).all()
+
+    # ~4800 feasible points of which the slowest take ~1200 months
+    with pytest.raises(ValueError, match='too large'):
+        scan_refinance_grid(100000, 4.0, 800, np.arange(5000) * 0.001, [0], new_payments=[400])
@@ -0,0 +1,45 @@
+import zipfile
+
+from batch_reports import _DirectoryWriter, _ZipWriter, generate_reports, load_loans
+
+
+def test_generate_reports_to_zip(tmp_path):
+    loans_csv = tmp_path / 'loans.csv'
+    loans_csv.write_text(
+        'id,loan_amount,annual_interest_rate,monthly_payment,fixed_period_years,include_extra\n'
+        'a,100000,3.0,1000,10,true\n'
+        'b,50000,2.5,800,,false\n'
+        'c,50000,2.5,50,,false\n'
+    )
+    loans = load_loans(str(loans_csv))
+    assert loans[0]['fixed_period_years'] == 10
+    assert loans[1]['include_extra'] is False
+
+    archive = tmp_path / 'reports.zip'
+    writer = _ZipWriter(str(archive))
+    stats = generate_reports(loans, writer, workers=2)
+    writer.close()
+
+    # Loan "c" can never be paid off and is reported as a failure
+    assert stats['generated'] == 2
+    assert [name for name, _ in stats['failed']] == ['3_loan_c_amount_50000.pdf']
+    with zipfile.ZipFile(archive) as zf:
+        names = zf.namelist()
+        assert names == ['1_loan_a_amount_100000.pdf', '2_loan_b_amount_50000.pdf']
+        assert zf.read(names[0]).startswith(b'%PDF')
+
+
+def test_duplicate_and_path_like_ids_get_unique_names(tmp_path):
+    loans_json = tmp_path / 'loans.json'
+    loans_json.write_text(
+        '[{"id": "x", "loan_amount": 10000, "annual_interest_rate": 3, "monthly_payment": 500},'
+        ' {"id": "x", "loan_amount": 10000, "annual_interest_rate": 3, "monthly_payment": 600},'
+        ' {"id": "../a/b", "loan_amount": 10000, "annual_interest_rate": 3, "monthly_payment": 500}]'
+    )
+    output_dir = tmp_path / 'reports'
+    writer = _DirectoryWriter(str(output_dir))
+    stats = generate_reports(load_loans(str(loans_json)), writer, workers=1)
+
+    assert stats['generated'] == 3
+    assert sorted(path.name for path in output_dir.iterdir()) == [
+        '1_loan_x_amount_10000.pdf', '2_loan_x_amount_10000.pdf', '3_loan_.._a_b_amount_10000.pdf']
@@ -39,5 +39,96 @@ def test_payment_components():
         print(f"{payment['month']:5d} | €{payment['principal_payment']:9,.2f} | €{payment['interest_payment']:8,.2f} | €{(payment['principal_payment'] + payment['interest_payment']):7,.2f} | €{payment['remaining_balance']:,.2f}")
 
 
+def test_cents_engine_reconciles_exactly():
+    calc = LoanCalculator()
+
+    loan_amount = 240000
+    float_details = calc.calculate_loan_payments(
+        loan_amount, 3.5, 1200, fixed_interest_period_years=10, include_extra_payment=True)
+    cents_details = calc.calculate_loan_payments(
+        loan_amount, 3.5, 1200, fixed_interest_period_years=10, include_extra_payment=True,
+        engine='cents')
+
+    cents = cents_details['cents']
+    schedule = cents_details['amortization_schedule']
+
+    # Principal repaid adds up to the loan amount to the cent
+    assert cents['total_payment'] - cents['total_interest'] == loan_amount * 100
+    assert sum(round(p['principal_payment'] * 100) for p in schedule) == loan_amount * 100
+    assert schedule[-1]['remaining_balance'] == 0
+
+    # Same term as the float engine, totals within rounding of each month
+    assert len(schedule) == len(float_details['amortization_schedule'])
+    assert abs(cents_details['total_interest'] - float_details['total_interest']) < 0.01 * len(schedule)
+    assert abs(cents_details['fixed_period_remaining'] - float_details['fixed_period_remaining']) < 0.01 * 120
+
+
+def test_cents_engine_batch_matches_single_loans():
+    from fixed_point import amortize_cents, calculate_loan_payments_cents
+
+    loans = [(100000, 3.0, 1000), (50000, 2.5, 800), (300000, 4.1, 1750)]
+    batch = amortize_cents(*zip(*loans), rounding='half_up')
+    for i, loan in enumerate(loans):
+        single = calculate_loan_payments_cents(*loan, rounding='half_up')
+        assert batch['total_interest'][i] == single['cents']['total_interest']
+        assert batch['term_months'][i] == len(single['amortization_schedule'])
+
+    # The scalar single-loan path matches the batch month by month
+    batch_schedule = amortize_cents(300000, 4.1, 1750, 10, include_extra_payment=True, keep_schedule=True)
+    single = calculate_loan_payments_cents(300000, 4.1, 1750, 10, include_extra_payment=True)
+    term = len(single['amortization_schedule'])
+    assert [row['remaining_balance'] for row in single['amortization_schedule']] == \
+        list(batch_schedule['remaining_balance'][0, :term] / 100)
+    assert single['cents']['fixed_period_remaining'] == batch_schedule['fixed_period_remaining'][0]
+
+    down = amortize_cents(*zip(*loans), rounding='down')
+    assert (down['total_interest'] <= batch['total_interest']).all()
+
+
+def test_cents_engine_rejects_invalid_inputs():
+    import pytest
+    from fixed_point import amortize_cents, calculate_loan_payments_cents
+
+    with pytest.raises(ValueError, match='positive'):
+        amortize_cents(100000, 0.0, 1000)
+    with pytest.raises(ValueError, match='finite'):
+        amortize_cents(100000, 3.0, float('inf'))
+    # balance * rate would overflow int64
+    with pytest.raises(ValueError, match='too large'):
+        amortize_cents(1e12, 15.0, 1.3e10)
+    # Cents beyond the int64 range must not wrap around
+    with pytest.raises(ValueError, match='too large'):
+        calculate_loan_payments_cents(1e17, 3.0, 1e16)
+    with pytest.raises(ValueError, match='positive'):
+        calculate_loan_payments_cents(-100000, 3.0, 1000)
+
+
+def test_sensitivities_match_finite_differences():
+    calc = LoanCalculator()
+
+    args = (240000, 3.5, 1200, 10)
+    loan_details = calc.calculate_loan_payments(
+        *args, include_extra_payment=True, with_sensitivities=True)
+    sensitivities = loan_details['sensitivities']
+    assert sensitivities['total_interest']['value'] == loan_details['total_interest']
+
+    h = 1e-4
+    bumped_rate = calc.calculate_loan_payments(240000, 3.5 + h, 1200, 10, include_extra_payment=True)
+    bumped_payment = calc.calculate_loan_payments(240000, 3.5, 1200 + h, 10, include_extra_payment=True)
+    for key in ('total_interest', 'fixed_period_remaining'):
+        rate_fd = (bumped_rate[key] - loan_details[key]) / h
+        payment_fd = (bumped_payment[key] - loan_details[key]) / h
+        assert abs(sensitivities[key]['annual_interest_rate'] - rate_fd) < 1e-3 * abs(rate_fd)
+        assert abs(sensitivities[key]['monthly_payment'] - payment_fd) < 1e-3 * abs(payment_fd)
+
+
 if __name__ == '__main__':
     test_payment_components()
+
+
+def test_sensitivities_require_float_engine():
+    import pytest
+
+    with pytest.raises(ValueError, match='float engine'):
+        LoanCalculator().calculate_loan_payments(
+            100000, 3.0, 1000, engine='cents', with_sensitivities=True)
@@ -0,0 +1,35 @@
+from differential import (_errors, differential_report, golden_cases, random_cases, run_reference,
+                          tolerance, violations)
+from loan_calculator import calculate_loan_payments
+
+
+def test_engines_agree_with_reference():
+    report = differential_report(random_cases(200, seed=0))
+
+    assert set(report) == {'cents', 'cents_batch', 'sensitivity', 'refinance', 'optimizer'}
+    assert violations(report) == []
+
+
+def test_js_golden_fixture_agrees_with_reference():
+    report = differential_report(golden_cases(), ['js'])
+
+    assert report['js']['total_interest']['max_abs_error'] < 1e-6
+    assert violations(report) == []
+
+
+def test_extra_payments_end_loan_before_fixed_period():
+    loan_details = calculate_loan_payments(100000, 3.0, 1000, 9, include_extra_payment=True)
+
+    assert len(loan_details['amortization_schedule']) < 9 * 12
+    assert loan_details['fixed_period_remaining'] == 0
+
+
+def test_missing_schedule_row_is_an_error():
+    reference = run_reference([{'loan_amount': 10000, 'annual_interest_rate': 3.0, 'monthly_payment': 500,
+                                'fixed_period_years': None, 'include_extra': False}])[0]
+    truncated = dict(reference, month=reference['month'][:-1],
+                     principal_payment=reference['principal_payment'][:-1])
+
+    absolute, _ = _errors(reference, truncated, 'principal_payment')
+    assert absolute == reference['principal_payment'][-1]
+    assert absolute > tolerance('cents', 'principal_payment')[0]
@@ -0,0 +1,17 @@
+import os
+
+from load_test import InProcessClient, format_report, parse_mix, run_load_test
+
+
+def test_in_process_load_test_reports_latency_and_rss():
+    results = run_load_test(
+        InProcessClient, concurrency=2, duration=1.0,
+        mix=parse_mix('short=1'), pdf_ratio=1.0,
+        rss_pid=os.getpid(), sample_interval=0.2)
+
+    stats = results['endpoints']['/calculate']
+    assert stats['count'] > 0
+    assert stats['p50_ms'] <= stats['p95_ms'] <= stats['p99_ms']
+    assert '/generate_pdf' in results['endpoints']
+    assert results['rss'] and results['rss'][0][1] > 0
+    assert 'RSS: start' in format_report(results)
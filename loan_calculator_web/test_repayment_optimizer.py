@@ -0,0 +1,39 @@
+import pytest
+
+from loan_calculator import calculate_loan_payments
+from repayment_optimizer import optimize_repayment
+
+
+LOANS = [
+    {'name': 'mortgage', 'loan_amount': 200000, 'annual_interest_rate': 3.0, 'monthly_payment': 1000},
+    {'name': 'car', 'loan_amount': 15000, 'annual_interest_rate': 6.5, 'monthly_payment': 300},
+    {'name': 'student', 'loan_amount': 5000, 'annual_interest_rate': 1.0, 'monthly_payment': 100},
+]
+
+
+def test_optimizer_prefers_avalanche_for_interest():
+    result = optimize_repayment(LOANS, monthly_budget=300, annual_budget=2000, n_random=100)
+
+    # Without surplus every loan runs on its own schedule
+    reference = sum(calculate_loan_payments(
+        loan['loan_amount'], loan['annual_interest_rate'], loan['monthly_payment'])['total_interest']
+        for loan in LOANS)
+    assert result['baseline']['total_interest'] == pytest.approx(reference)
+
+    ranking = {strategy['name']: strategy for strategy in result['ranking']}
+    assert len(ranking) == 3 + 100
+    assert result['best']['name'] == 'avalanche'
+    assert ranking['avalanche']['total_interest'] < ranking['snowball']['total_interest']
+    assert result['best']['total_interest'] < result['baseline']['total_interest']
+    assert ranking['snowball']['payoff_months']['student'] < ranking['avalanche']['payoff_months']['student']
+
+
+def test_optimizer_rejects_unknown_objective():
+    with pytest.raises(ValueError):
+        optimize_repayment(LOANS, objective='fastest')
+
+
+@pytest.mark.parametrize('split', [[1, 1], [1, -1, 1], [1, float('nan'), 1], [0, 0, 0], ['a', 1, 1]])
+def test_optimizer_rejects_invalid_custom_splits(split):
+    with pytest.raises(ValueError, match='Custom split 1'):
+        optimize_repayment(LOANS, custom_splits=[split], n_random=0)